@@ -0,0 +1,173 @@
+"""Общая обвязка представлений API.
+
+api_view разбирает аутентификацию (сессия или HTTP Basic), проверяет
+CSRF для запросов из браузера, превращает ApiError и Http404 в ответы
+JSON; там, где разрешён GET, разрешён и HEAD. json_response ставит ETag
+по содержимому ответа и отвечает 304 Not Modified, если клиент прислал
+тот же ETag в If-None-Match.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from functools import wraps
+
+from django.contrib.auth import authenticate
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, QueryDict
+from django.http.multipartparser import MultiPartParserError
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+
+from posts.paginators import CursorPaginator
+
+from .errors import ApiError
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def basic_user(request):
+    """Пользователь из заголовка Authorization: Basic или None."""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, credentials = header.partition(' ')
+    if scheme.lower() != 'basic' or not credentials:
+        return None
+    try:
+        decoded = base64.b64decode(credentials).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ApiError(401, 'Некорректный заголовок Authorization.')
+    username, _, password = decoded.partition(':')
+    user = authenticate(request, username=username, password=password)
+    if user is None:
+        raise ApiError(401, 'Неверное имя пользователя или пароль.')
+    return user
+
+
+def enforce_csrf(request):
+    """Проверка CSRF для сессионной аутентификации, как у форм сайта."""
+    reason = CsrfViewMiddleware().process_view(request, None, (), {})
+    if reason is not None:
+        raise ApiError(403, 'Нет CSRF-токена или он неверный.')
+
+
+def authenticate_request(request):
+    user = basic_user(request)
+    if user is not None:
+        request.user = user
+    elif (request.user.is_authenticated
+          and request.method not in SAFE_METHODS):
+        enforce_csrf(request)
+
+
+def error_response(request, error):
+    response = json_response(
+        request, {'detail': error.detail, **error.extra}, status=error.status)
+    if error.status == 401:
+        response['WWW-Authenticate'] = 'Basic realm="api"'
+    return response
+
+
+def api_view(*methods):
+    if 'GET' in methods and 'HEAD' not in methods:
+        methods += ('HEAD',)
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise ApiError(405, 'Метод не поддерживается.')
+                authenticate_request(request)
+                response = view(request, *args, **kwargs)
+            except ApiError as error:
+                response = error_response(request, error)
+            except Http404:
+                response = error_response(
+                    request, ApiError(404, 'Не найдено.'))
+            if response.status_code == 405:
+                response['Allow'] = ', '.join(methods)
+            return response
+        return wrapper
+    return decorator
+
+
+def login_required(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна аутентификация.')
+
+
+def json_response(request, data, status=200):
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    response = HttpResponse(
+        body, status=status, content_type='application/json')
+    patch_vary_headers(response, ('Cookie', 'Authorization'))
+    if status != 200 or request.method not in ('GET', 'HEAD'):
+        return response
+    response['ETag'] = '"{}"'.format(hashlib.md5(body.encode()).hexdigest())
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response)
+
+
+def payload(request):
+    """Данные запроса: JSON-тело или поля формы (с файлами).
+
+    Django разбирает формы только в POST; тела PUT и PATCH в форматах
+    форм разбираются здесь, остальные форматы — 415.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ApiError(400, 'Тело запроса — некорректный JSON.')
+        if not isinstance(data, dict):
+            raise ApiError(400, 'Ожидается JSON-объект.')
+        return data, None
+    if request.method == 'POST':
+        return request.POST.dict(), request.FILES
+    if request.content_type == 'multipart/form-data':
+        try:
+            data, files = request.parse_file_upload(request.META, request)
+        except MultiPartParserError:
+            raise ApiError(400, 'Тело запроса — некорректная форма.')
+        return data.dict(), files
+    if request.content_type == 'application/x-www-form-urlencoded':
+        return QueryDict(request.body, encoding=request.encoding).dict(), None
+    raise ApiError(
+        415, 'Ожидается JSON, multipart/form-data или '
+             'application/x-www-form-urlencoded.')
+
+
+def form_errors(form):
+    return ApiError(
+        400, 'Ошибка в данных.', errors=form.errors.get_json_data())
+
+
+def limit(request):
+    try:
+        value = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return min(max(value, 1), MAX_LIMIT)
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def paginated(request, queryset, serialize_one, ordering):
+    """Страница по курсору: {'results': [...], 'next', 'previous'}."""
+    page = CursorPaginator(queryset, limit(request), ordering).get_page(
+        cursor=request.GET.get('cursor'))
+    return {
+        'results': [serialize_one(obj) for obj in page],
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    }
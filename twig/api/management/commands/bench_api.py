@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает пропускную способность API и HTML-страниц.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--user',
+            help='От чьего имени ходить (HTML-кэш страниц для '
+                 'пользователей выключен, поэтому меряется рендеринг).',
+        )
+
+    def handle(self, *args, **options):
+        post = Post.objects.order_by('-pub_date').first()
+        if post is None:
+            raise CommandError('В базе нет постов.')
+        user = (
+            User.objects.get(username=options['user']) if options['user']
+            else post.author
+        )
+        # Адрес вне INTERNAL_IPS: debug toolbar не должен попасть в замер.
+        client = Client(SERVER_NAME='localhost', REMOTE_ADDR='192.0.2.1')
+        client.force_login(user)
+        pairs = (
+            ('лента', reverse('posts:index'), reverse('api:post_list')),
+            (
+                'пост',
+                reverse('posts:post_detail', args=[post.pk]),
+                reverse('api:post_detail', args=[post.pk]),
+            ),
+        )
+        for title, html_url, api_url in pairs:
+            for kind, url in (('HTML', html_url), ('API', api_url)):
+                rate, size = self.measure(client, url, options['requests'])
+                self.stdout.write(
+                    f'{title}, {kind}: {rate:.0f} запросов/с, '
+                    f'{size / 1024:.1f} КБ на ответ'
+                )
+
+    @staticmethod
+    def measure(client, url, count):
+        client.get(url)
+        started = time.perf_counter()
+        size = 0
+        for _ in range(count):
+            size += len(client.get(url).content)
+        return count / (time.perf_counter() - started), size / count
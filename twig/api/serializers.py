@@ -0,0 +1,60 @@
+"""Представление моделей в JSON и выбор полей через ?fields=.
+
+Для каждой модели задан словарь «поле → функция(объект, запрос)».
+Функции читают только то, что уже загружено select_related, поэтому
+сериализация страницы не делает запросов на каждую строку.
+"""
+from .errors import ApiError
+
+
+def image_url(post, request):
+    return request.build_absolute_uri(post.image.url) if post.image else None
+
+
+POST_FIELDS = {
+    'id': lambda post, request: post.pk,
+    'text': lambda post, request: post.text,
+    'pub_date': lambda post, request: post.pub_date,
+    'author': lambda post, request: post.author.username,
+    'group': lambda post, request: post.group.slug if post.group else None,
+    'image': image_url,
+    'comments_count': lambda post, request: post.comments_count,
+}
+
+GROUP_FIELDS = {
+    'id': lambda group, request: group.pk,
+    'title': lambda group, request: group.title,
+    'slug': lambda group, request: group.slug,
+    'description': lambda group, request: group.description,
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment, request: comment.pk,
+    'post': lambda comment, request: comment.post_id,
+    'author': lambda comment, request: comment.author.username,
+    'text': lambda comment, request: comment.text,
+    'created': lambda comment, request: comment.created,
+}
+
+FOLLOW_FIELDS = {
+    'id': lambda follow, request: follow.pk,
+    'user': lambda follow, request: follow.user.username,
+    'author': lambda follow, request: follow.author.username,
+}
+
+
+def selected_fields(request, available):
+    """Поля из ?fields=a,b или все поля модели."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(unknown)}.')
+    return fields
+
+
+def serialize(obj, request, available, fields=None):
+    fields = fields or selected_fields(request, available)
+    return {name: available[name](obj, request) for name in fields}
@@ -0,0 +1,172 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from core.query_budget import query_budget
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Ilya', password='secret-pass')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов')
+        for i in range(25):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}')
+        Comment.objects.create(
+            post=Post.objects.latest('pk'), author=cls.reader,
+            text='Комментарий',
+        )
+
+    def setUp(self):
+        self.post = Post.objects.latest('pk')
+        self.client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_post_list_cursor_pagination(self):
+        """Курсоры проходят все посты без повторов, не выходя из бюджета."""
+        seen = []
+        url = reverse('api:post_list')
+        while url:
+            with query_budget(2, 'api:post_list'):
+                data = self.client.get(url).json()
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(
+            seen,
+            list(Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)),
+        )
+        first = self.get('post_list').json()['results'][0]
+        self.assertEqual(first['author'], 'Ilya')
+        self.assertEqual(first['group'], 'cats')
+
+    def test_sparse_fields(self):
+        data = self.get('post_detail', self.post.pk, fields='id,text').json()
+        self.assertEqual(data, {'id': self.post.pk, 'text': self.post.text})
+        response = self.get('post_list', fields='id,secret')
+        self.assertEqual(response.status_code, 400)
+
+    def test_conditional_get(self):
+        response = self.get('post_detail', self.post.pk)
+        etag = response['ETag']
+        response = self.client.get(
+            reverse('api:post_detail', args=[self.post.pk]),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 304)
+        self.post.text = 'Изменённый текст'
+        self.post.save()
+        response = self.client.get(
+            reverse('api:post_detail', args=[self.post.pk]),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_post_requires_auth(self):
+        url = reverse('api:post_list')
+        body = json.dumps({'text': 'Новый пост', 'group': 'cats'})
+        response = self.client.post(url, body, 'application/json')
+        self.assertEqual(response.status_code, 401)
+        response = self.author_client.post(url, body, 'application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['group'], 'cats')
+        credentials = base64.b64encode(b'Ilya:secret-pass').decode()
+        response = self.client.post(
+            url, json.dumps({'text': ''}), 'application/json',
+            HTTP_AUTHORIZATION=f'Basic {credentials}',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_session_write_checks_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        response = client.post(
+            reverse('api:post_list'), json.dumps({'text': 'Пост'}),
+            'application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_only_author_edits_post(self):
+        url = reverse('api:post_detail', args=[self.post.pk])
+        reader = Client()
+        reader.force_login(self.reader)
+        patch = json.dumps({'text': 'Правка'})
+        response = reader.patch(url, patch, 'application/json')
+        self.assertEqual(response.status_code, 403)
+        response = self.author_client.patch(url, patch, 'application/json')
+        self.assertEqual(response.json()['text'], 'Правка')
+        self.assertEqual(response.json()['group'], 'cats')
+        response = self.author_client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_head_allowed_with_get(self):
+        for url in (reverse('api:post_list'),
+                    reverse('api:post_detail', args=[self.post.pk]),
+                    reverse('api:group_detail', args=['cats'])):
+            with self.subTest(url=url):
+                response = self.author_client.head(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, b'')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Пост 24')
+
+    def test_patch_with_form_bodies(self):
+        """PUT и PATCH принимают multipart и urlencoded, прочее — 415."""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        client = self.author_client
+        body = encode_multipart(BOUNDARY, {'text': 'Из формы'})
+        response = client.patch(url, body, MULTIPART_CONTENT)
+        self.assertEqual(response.json()['text'], 'Из формы')
+        response = client.put(
+            url, 'text=%D0%9F%D1%83%D1%82',
+            'application/x-www-form-urlencoded')
+        self.assertEqual(response.json()['text'], 'Пут')
+        response = client.patch(url, 'text: Правка', 'text/yaml')
+        self.assertEqual(response.status_code, 415)
+
+    def test_comments(self):
+        url = reverse('api:comment_list', args=[self.post.pk])
+        response = self.author_client.post(
+            url, json.dumps({'text': 'Ответ'}), 'application/json')
+        self.assertEqual(response.status_code, 201)
+        texts = [c['text'] for c in self.client.get(url).json()['results']]
+        self.assertEqual(texts, ['Комментарий', 'Ответ'])
+
+    def test_follows(self):
+        url = reverse('api:follow_list')
+        reader = Client()
+        reader.force_login(self.reader)
+        response = reader.post(
+            url, json.dumps({'author': 'Ilya'}), 'application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            reader.get(url).json()['results'][0]['author'], 'Ilya')
+        response = reader.delete(
+            reverse('api:follow_detail', args=['Ilya']))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_groups_and_errors(self):
+        data = self.get('group_detail', 'cats').json()
+        self.assertEqual(data['title'], 'Коты')
+        self.assertEqual(self.get('group_detail', 'dogs').status_code, 404)
+        response = self.client.put(reverse('api:group_list'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
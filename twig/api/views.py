@@ -0,0 +1,147 @@
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+
+from .errors import ApiError
+from .http import (api_view, form_errors, json_response, login_required,
+                   paginated, payload)
+from .serializers import (COMMENT_FIELDS, FOLLOW_FIELDS, GROUP_FIELDS,
+                          POST_FIELDS, selected_fields, serialize)
+
+
+def serializer(request, available):
+    fields = selected_fields(request, available)
+    return lambda obj: serialize(obj, request, available, fields)
+
+
+def post_form_data(data, post=None):
+    """Данные для PostForm: группа в API задаётся слагом."""
+    values = {}
+    if post is not None:
+        values = {'text': post.text, 'group': post.group_id}
+    values.update(data)
+    slug = values.get('group')
+    if isinstance(slug, str) and slug:
+        group = Group.objects.filter(slug=slug).values_list(
+            'pk', flat=True).first()
+        if group is None:
+            raise ApiError(400, f'Группа {slug} не найдена.')
+        values['group'] = group
+    return values
+
+
+@api_view('GET', 'POST')
+def post_list(request):
+    if request.method == 'POST':
+        login_required(request)
+        data, files = payload(request)
+        form = PostForm(post_form_data(data), files)
+        if not form.is_valid():
+            raise form_errors(form)
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return json_response(
+            request, serialize(post, request, POST_FIELDS), status=201)
+    posts = Post.objects.with_related()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return json_response(request, paginated(
+        request, posts, serializer(request, POST_FIELDS),
+        ('-pub_date', '-pk'),
+    ))
+
+
+@api_view('GET', 'PUT', 'PATCH', 'DELETE')
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.with_related(), pk=post_id)
+    if request.method in ('GET', 'HEAD'):
+        return json_response(request, serialize(post, request, POST_FIELDS))
+    login_required(request)
+    if post.author_id != request.user.pk:
+        raise ApiError(403, 'Изменять пост может только его автор.')
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=204)
+    data, files = payload(request)
+    form = PostForm(
+        post_form_data(data, post if request.method == 'PATCH' else None),
+        files,
+        instance=post,
+    )
+    if not form.is_valid():
+        raise form_errors(form)
+    post = form.save()
+    return json_response(request, serialize(post, request, POST_FIELDS))
+
+
+@api_view('GET')
+def group_list(request):
+    return json_response(request, paginated(
+        request, Group.objects.all(), serializer(request, GROUP_FIELDS),
+        ('title', 'pk'),
+    ))
+
+
+@api_view('GET')
+def group_detail(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return json_response(request, serialize(group, request, GROUP_FIELDS))
+
+
+@api_view('GET', 'POST')
+def comment_list(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    if request.method == 'POST':
+        login_required(request)
+        form = CommentForm(payload(request)[0])
+        if not form.is_valid():
+            raise form_errors(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return json_response(
+            request, serialize(comment, request, COMMENT_FIELDS), status=201)
+    comments = Comment.objects.filter(
+        post=post, active=True).select_related('author')
+    return json_response(request, paginated(
+        request, comments, serializer(request, COMMENT_FIELDS),
+        ('created', 'pk'),
+    ))
+
+
+@api_view('GET', 'POST')
+def follow_list(request):
+    login_required(request)
+    if request.method == 'POST':
+        username = payload(request)[0].get('author')
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise ApiError(400, 'Автор не найден.')
+        if author == request.user:
+            raise ApiError(400, 'Нельзя подписаться на себя.')
+        follow, created = Follow.objects.get_or_create(
+            user=request.user, author=author)
+        return json_response(
+            request, serialize(follow, request, FOLLOW_FIELDS),
+            status=201 if created else 200,
+        )
+    follows = Follow.objects.filter(
+        user=request.user).select_related('user', 'author')
+    return json_response(request, paginated(
+        request, follows, serializer(request, FOLLOW_FIELDS), ('-pk',),
+    ))
+
+
+@api_view('DELETE')
+def follow_detail(request, username):
+    login_required(request)
+    follow = get_object_or_404(
+        Follow, user=request.user, author__username=username)
+    follow.delete()
+    return HttpResponse(status=204)
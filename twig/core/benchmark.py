@@ -0,0 +1,96 @@
+"""Замер пиковой памяти кода в отдельном процессе.
+
+Пик RSS — максимум за всю жизнь процесса, поэтому каждый замер
+запускается в свежем интерпретаторе (multiprocessing, spawn): так
+результат не зависит от того, что уже делал текущий процесс. На Linux
+пик берётся из VmHWM: в отличие от ru_maxrss он не наследуется
+от родителя через fork/exec.
+"""
+import multiprocessing
+import queue as queues
+import resource
+import sys
+import time
+import traceback
+from importlib import import_module
+
+# Как часто родитель проверяет, жив ли процесс замера.
+POLL_SECONDS = 1
+
+
+def max_rss_kb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты.
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def load(target):
+    module, _, name = target.partition(':')
+    return getattr(import_module(module), name)
+
+
+def _child(queue, target, args):
+    try:
+        import django
+        django.setup()
+        func = load(target)
+        baseline = max_rss_kb()
+        started = time.perf_counter()
+        func(*args)
+        queue.put({
+            'baseline_kb': baseline,
+            'peak_kb': max_rss_kb(),
+            'seconds': time.perf_counter() - started,
+        })
+    except BaseException:
+        queue.put({'error': traceback.format_exc()})
+
+
+def wait_result(process, queue, timeout):
+    """Ждёт результат замера, пока процесс жив, но не дольше timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=POLL_SECONDS)
+        except queues.Empty:
+            pass
+        if not process.is_alive():
+            # Результат мог прийти между get() и проверкой.
+            try:
+                return queue.get(timeout=POLL_SECONDS)
+            except queues.Empty:
+                raise RuntimeError(
+                    f'Процесс замера завершился с кодом {process.exitcode}'
+                ) from None
+        if deadline is not None and time.monotonic() > deadline:
+            raise RuntimeError(f'Замер не уложился в {timeout} с')
+
+
+def measure(target, *args, timeout=None):
+    """Запускает target ('модуль:функция') в новом процессе.
+
+    Возвращает словарь с RSS до вызова, пиком RSS после и временем.
+    Если target упал, процесс завершился без результата или не уложился
+    в timeout секунд, бросает RuntimeError.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, target, args))
+    process.start()
+    try:
+        result = wait_result(process, queue, timeout)
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    if 'error' in result:
+        raise RuntimeError(f'Замер {target} упал:\n{result["error"]}')
+    result['delta_kb'] = result['peak_kb'] - result['baseline_kb']
+    return result
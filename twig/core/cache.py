@@ -0,0 +1,328 @@
+"""Кэш в файле SQLite, общий для всех процессов WSGI-сервера.
+
+Не требует отдельного сервиса: каждый процесс открывает один и тот же
+файл в режиме WAL, поэтому чтения не блокируют друг друга и записи.
+Записи вытесняются по давности последнего обращения (LRU), когда
+превышен MAX_ENTRIES или суммарный размер MAX_SIZE в байтах.
+
+Пример настройки:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/twig-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 2 ** 20},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL,'
+    ' size INTEGER NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE TABLE IF NOT EXISTS stats ('
+    ' name TEXT PRIMARY KEY,'
+    ' value INTEGER NOT NULL'
+    ')',
+)
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_size = options.get('MAX_SIZE')
+        # Время последнего обращения обновляется не чаще раза в секунду,
+        # чтобы чтение горячих ключей не превращалось в запись.
+        self._touch_interval = options.get('TOUCH_INTERVAL', 1.0)
+        # Проверка лимитов стоит COUNT(*), поэтому выполняется раз
+        # в CULL_CHECK_EVERY записей процесса.
+        self._check_every = options.get('CULL_CHECK_EVERY', 100)
+        self._busy_timeout = options.get('TIMEOUT', 5)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self._path,
+                timeout=self._busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _fetch(self, keys):
+        conn = self._connection()
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        rows = conn.execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+        found, expired, stale = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed > self._touch_interval:
+                stale.append(key)
+        if expired:
+            conn.execute(
+                f'DELETE FROM cache WHERE key IN '
+                f'({",".join("?" * len(expired))}) AND expires <= ?',
+                (*expired, now),
+            )
+        if stale:
+            conn.execute(
+                f'UPDATE cache SET accessed = ? WHERE key IN '
+                f'({",".join("?" * len(stale))})',
+                (now, *stale),
+            )
+        for key in keys:
+            self._count(key in found)
+        return found
+
+    def _write(self, conn, key, value, timeout):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed, '
+            'size) VALUES (?, ?, ?, ?, ?)',
+            (key, pickled, self.get_backend_timeout(timeout), time.time(),
+             len(pickled)),
+        )
+
+    def _after_write(self, count=1):
+        with self._lock:
+            self._writes += count
+            due = self._writes >= self._check_every
+            if due:
+                self._writes = 0
+        if due:
+            self.cull()
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        mapping = {self.make_key(key, version=version): key for key in keys}
+        for key in mapping:
+            self.validate_key(key)
+        if not mapping:
+            return {}
+        found = self._fetch(list(mapping))
+        return {mapping[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._write(self._connection(), key, value, timeout)
+        self._after_write()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        conn = self._connection()
+        with transaction(conn):
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                self._write(conn, key, value, timeout)
+        self._after_write(len(data))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        conn = self._connection()
+        with transaction(conn):
+            row = conn.execute(
+                'SELECT expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and (row[0] is None or row[0] > time.time()):
+                return False
+            self._write(conn, key, value, timeout)
+        self._after_write()
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        conn = self._connection()
+        with transaction(conn):
+            row = conn.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, self.pickle_protocol)
+            conn.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (pickled, len(pickled), key),
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), time.time(), key,
+             time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        if keys:
+            placeholders = ','.join('?' * len(keys))
+            self._connection().execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', keys
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def cull(self):
+        """Удаляет просроченные записи и вытесняет самые давние (LRU)."""
+        conn = self._connection()
+        with transaction(conn):
+            conn.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            )
+            entries, size = conn.execute(
+                'SELECT COUNT(*), TOTAL(size) FROM cache'
+            ).fetchone()
+            excess = 0
+            if self._max_entries and entries > self._max_entries:
+                # Как и в LocMemCache, вытесняем с запасом: 1/CULL_FREQUENCY
+                # от лимита, чтобы не чистить кэш на каждой записи.
+                excess = entries - self._max_entries
+                if self._cull_frequency:
+                    excess += self._max_entries // self._cull_frequency
+            evicted = 0
+            if excess:
+                evicted += conn.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                    'ORDER BY accessed LIMIT ?)',
+                    (excess,),
+                ).rowcount
+                size = conn.execute(
+                    'SELECT TOTAL(size) FROM cache'
+                ).fetchone()[0]
+            if self._max_size and size > self._max_size:
+                rows = conn.execute(
+                    'SELECT key, size FROM cache ORDER BY accessed'
+                )
+                victims = []
+                for key, item_size in rows:
+                    if size <= self._max_size:
+                        break
+                    victims.append(key)
+                    size -= item_size
+                conn.executemany(
+                    'DELETE FROM cache WHERE key = ?',
+                    [(key,) for key in victims],
+                )
+                evicted += len(victims)
+            if evicted:
+                conn.execute(
+                    'INSERT INTO stats (name, value) VALUES (?, ?) '
+                    'ON CONFLICT (name) DO UPDATE '
+                    'SET value = value + excluded.value',
+                    ('evictions', evicted),
+                )
+        return evicted
+
+    def stats(self):
+        """Счётчики кэша.
+
+        Попадания и промахи считаются в текущем процессе, вытеснения,
+        число записей и объём — общие для всех процессов.
+        """
+        conn = self._connection()
+        entries, size = conn.execute(
+            'SELECT COUNT(*), TOTAL(size) FROM cache'
+        ).fetchone()
+        row = conn.execute(
+            "SELECT value FROM stats WHERE name = 'evictions'"
+        ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': row[0] if row else 0,
+            'entries': entries,
+            'size': int(size),
+        }
+
+    def close(self, **kwargs):
+        # Соединение живёт весь срок потока: Django закрывает кэши после
+        # каждого запроса, а открывать файл заново слишком дорого.
+        pass
+
+
+@contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT для соединения в режиме autocommit."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
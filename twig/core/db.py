@@ -0,0 +1,139 @@
+"""SQLite под нагрузкой: настройка соединений и разделение чтения и записи.
+
+configure_sqlite() подключён к сигналу connection_created и выполняет
+PRAGMA из settings.SQLITE_PRAGMAS для каждого нового соединения.
+Главное из них — журнал WAL: читатели не ждут писателя и видят последнее
+закоммиченное состояние, а писатели ждут друг друга busy_timeout
+миллисекунд вместо мгновенной ошибки «database is locked».
+
+ReadWriteRouter отправляет чтения в реплики (settings.DATABASE_REPLICAS),
+а запись — в default. По умолчанию реплика одна — тот же файл, открытый
+с mode=ro. Чтения идут в default, если:
+- это транзакция transaction.atomic(), которая должна видеть свои
+  незакоммиченные изменения;
+- в этом запросе уже была запись;
+- пользователь недавно писал: PrimaryStickyMiddleware ставит cookie на
+  DATABASE_PRIMARY_STICKY_SECONDS, и пока она жива, все его запросы
+  читают из default, а не из реплики, которая могла ещё не догнать;
+- код явно попросил об этом (use_primary, primary_reads) — например,
+  кэш страниц, чтобы не сохранить под новой версией старые данные.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Журнал нельзя переключить из соединения только для чтения: режим WAL
+# хранится в самом файле базы и включается соединением default.
+WRITE_ONLY_PRAGMAS = ('journal_mode',)
+STICKY_COOKIE = 'primary_until'
+
+_state = threading.local()
+
+
+def is_read_only(connection):
+    return 'mode=ro' in str(connection.settings_dict['NAME'])
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    read_only = is_read_only(connection)
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            if read_only and name in WRITE_ONLY_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def replica_aliases():
+    """Настроенные реплики для чтения; пустой список — только default."""
+    return [
+        alias for alias in getattr(settings, 'DATABASE_REPLICAS', ())
+        if alias in settings.DATABASES
+    ]
+
+
+def sticky_seconds():
+    return getattr(settings, 'DATABASE_PRIMARY_STICKY_SECONDS', 0)
+
+
+def use_primary():
+    """Читать из default до конца запроса (или потока вне запросов)."""
+    _state.primary = True
+
+
+@contextmanager
+def primary_reads():
+    """Читать из default внутри блока."""
+    previous = getattr(_state, 'primary', False)
+    _state.primary = True
+    try:
+        yield
+    finally:
+        _state.primary = previous
+
+
+def reset():
+    _state.primary = False
+    _state.wrote = False
+
+
+def wrote():
+    return getattr(_state, 'wrote', False)
+
+
+class ReadWriteRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if (not replicas
+                or getattr(_state, 'primary', False)
+                or wrote()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них связываются свободно.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryStickyMiddleware:
+    """Read-your-writes: после записи пользователь читает из default.
+
+    Должен стоять выше SessionMiddleware, чтобы запись сессии тоже
+    продлевала окно.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset()
+        try:
+            until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            until = 0
+        if until > time.time():
+            use_primary()
+        try:
+            response = self.get_response(request)
+            seconds = sticky_seconds()
+            if wrote() and seconds > 0:
+                response.set_cookie(
+                    STICKY_COOKIE, str(int(time.time() + seconds)),
+                    max_age=seconds, httponly=True, samesite='Lax',
+                )
+        finally:
+            reset()
+        return response
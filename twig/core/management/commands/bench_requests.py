@@ -0,0 +1,59 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+User = get_user_model()
+
+DEFAULT_URLS = ('/', '/api/v1/posts/')
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время ответа страниц в текущем профиле настроек.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', default=DEFAULT_URLS)
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument(
+            '--user',
+            help='Ходить от имени пользователя (по умолчанию — первого): '
+                 'так страницы не берутся из кэша страниц целиком.',
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        client = Client(SERVER_NAME='localhost', REMOTE_ADDR='127.0.0.1')
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        user = users.first()
+        if user is not None:
+            client.force_login(user)
+        results = {}
+        for url in options['urls']:
+            client.get(url)
+            timings = []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[url] = {
+                'status': response.status_code,
+                'mean_ms': statistics.mean(timings),
+                'p95_ms': timings[int(len(timings) * 0.95) - 1],
+            }
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(f'DEBUG={settings.DEBUG}')
+        for url, result in results.items():
+            self.stdout.write(
+                f'{url}: {result["mean_ms"]:.2f} мс в среднем, '
+                f'p95 {result["p95_ms"]:.2f} мс '
+                f'(HTTP {result["status"]})'
+            )
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ('dev', 'prod')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время ответа в профилях настроек dev и prod: '
+            'каждый профиль запускается в отдельном процессе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*')
+        parser.add_argument('--requests', type=int, default=100)
+
+    def run(self, profile, env, *args):
+        command = [sys.executable, sys.argv[0], *args]
+        result = subprocess.run(
+            command, env={**env, 'TWIG_ENV': profile},
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(
+                f'{profile}: {" ".join(args)}\n{result.stderr}')
+        return result.stdout
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory() as static_root:
+            # Хэшированной статике prod нужен манифест collectstatic,
+            # а без SECRET_KEY в окружении профиль prod не загрузится.
+            env = {
+                'SECRET_KEY': 'bench-settings', **os.environ,
+                'STATIC_ROOT': static_root,
+            }
+            self.run('prod', env, 'collectstatic', '--noinput')
+            for profile in PROFILES:
+                output = self.run(
+                    profile, env, 'bench_requests', '--json',
+                    '--requests', str(options['requests']),
+                    *options['urls'],
+                )
+                results[profile] = json.loads(output.splitlines()[-1])
+        dev, prod = (results[profile] for profile in PROFILES)
+        for url in dev:
+            before, after = dev[url]['mean_ms'], prod[url]['mean_ms']
+            self.stdout.write(
+                f'{url}: dev {before:.2f} мс, prod {after:.2f} мс '
+                f'({before / after:.1f}x)'
+            )
@@ -0,0 +1,122 @@
+import multiprocessing
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.test import override_settings
+
+from posts.models import Post
+
+User = get_user_model()
+
+MARKER = '[bench_sqlite]'
+# Как работает Django без настройки: журнал с откатом, одна база.
+PLAIN = {
+    'SQLITE_PRAGMAS': {'journal_mode': 'delete'},
+    'DATABASE_REPLICAS': [],
+}
+
+
+def read_feed(stop, results):
+    timings, errors = [], 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            list(Post.objects.with_related().order_by('-pub_date')[:10])
+        except OperationalError:
+            errors += 1
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+    connections.close_all()
+    results.put({'reads': timings, 'read_errors': errors})
+
+
+def write_posts(stop, results, author_id, burst):
+    written, errors = 0, 0
+    while not stop.is_set():
+        try:
+            with transaction.atomic():
+                for _ in range(burst):
+                    Post.objects.create(
+                        author_id=author_id, text=f'{MARKER} пост')
+        except OperationalError:
+            errors += 1
+            continue
+        written += burst
+    connections.close_all()
+    results.put({'writes': written, 'write_errors': errors})
+
+
+class Command(BaseCommand):
+    help = ('Чтение ленты во время пачек записей: задержки и ошибки '
+            '«database is locked» без настройки SQLite и с WAL. '
+            'Пишет в базу — запускайте на копии (SQLITE_PATH).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--burst', type=int, default=50,
+                            help='Постов в одной транзакции записи.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Нужна база SQLite.')
+        author = User.objects.order_by('pk').first()
+        if author is None:
+            raise CommandError('В базе нет пользователей.')
+        for label, overrides in (('plain', PLAIN), ('tuned', {})):
+            connections.close_all()
+            with override_settings(**overrides):
+                stats = self.run(author, options)
+            connections.close_all()
+            Post.objects.filter(text__startswith=MARKER).delete()
+            self.report(label, stats)
+
+    def run(self, author, options):
+        # Отдельные процессы, как воркеры gunicorn: потоки одного процесса
+        # упирались бы в GIL раньше, чем в блокировки SQLite.
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        results = context.Queue()
+        workers = [
+            context.Process(target=target, args=(stop, results, *extra))
+            for target, count, extra in (
+                (read_feed, options['readers'], ()),
+                (write_posts, options['writers'],
+                 (author.pk, options['burst'])),
+            )
+            for _ in range(count)
+        ]
+        for worker in workers:
+            worker.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        stats = {'reads': [], 'read_errors': 0, 'writes': 0,
+                 'write_errors': 0}
+        for _ in workers:
+            for key, value in results.get().items():
+                stats[key] += value
+        for worker in workers:
+            worker.join()
+        return stats
+
+    def report(self, label, stats):
+        reads = sorted(stats['reads']) or [0]
+        self.stdout.write(
+            f'{label}: journal={settings.SQLITE_PRAGMAS["journal_mode"]}'
+            if label == 'tuned' else f'{label}: настройки Django по умолчанию'
+        )
+        self.stdout.write(
+            f'  чтений {len(stats["reads"])}, '
+            f'p50 {statistics.median(reads):.1f} мс, '
+            f'p99 {reads[int(len(reads) * 0.99) - 1]:.1f} мс, '
+            f'max {reads[-1]:.1f} мс, ошибок {stats["read_errors"]}'
+        )
+        self.stdout.write(
+            f'  записано постов {stats["writes"]}, '
+            f'ошибок записи {stats["write_errors"]}'
+        )
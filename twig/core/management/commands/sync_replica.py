@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def sqlite_path(alias):
+    """Путь к файлу базы без префикса file: и параметров URI."""
+    name = str(connections[alias].settings_dict['NAME'])
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    return name
+
+
+def copy_database(source, target):
+    """Копирует базу целиком через backup API SQLite."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+        # Копия унаследовала бы режим WAL, а его файлы -wal и -shm
+        # не создать из соединений реплики, открытых только для чтения.
+        dst.execute('PRAGMA journal_mode = delete')
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу в файл-реплику (SQLITE_REPLICA_PATH). '
+            'С --interval повторяет копирование, имитируя отстающую '
+            'реплику.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', default='replica',
+                            help='Псевдоним реплики в DATABASES.')
+        parser.add_argument('--interval', type=float,
+                            help='Копировать каждые N секунд.')
+
+    def handle(self, *args, **options):
+        alias = options['replica']
+        if alias not in connections.databases:
+            raise CommandError(
+                f'Реплика {alias} не настроена: задайте SQLITE_REPLICA_PATH.')
+        source = sqlite_path('default')
+        target = sqlite_path(alias)
+        while True:
+            copy_database(source, target)
+            self.stdout.write(f'{source} → {target}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
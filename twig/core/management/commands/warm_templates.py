@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templates import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Загружает все шаблоны в кэш загрузчика и показывает время '
+            'разбора и рендеринга каждого.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--render',
+            action='store_true',
+            help='Ещё и отрендерить каждый шаблон с пустым контекстом.',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Сколько самых медленных шаблонов показать (0 — все).',
+        )
+
+    def handle(self, *args, **options):
+        timings = warm_templates(render=options['render'])
+        failed = [timing for timing in timings if timing.error]
+        ok = sorted(
+            (timing for timing in timings if not timing.error),
+            key=lambda timing: timing.parse_ms + (timing.render_ms or 0),
+            reverse=True,
+        )
+        top = options['top'] or len(ok)
+        for timing in ok[:top]:
+            line = f'{timing.parse_ms:8.2f} мс  {timing.name}'
+            if timing.render_ms is not None:
+                line += f' (рендеринг {timing.render_ms:.2f} мс)'
+            elif timing.render_error:
+                line += f' (рендеринг: {timing.render_error})'
+            self.stdout.write(line)
+        total = sum(timing.parse_ms for timing in ok)
+        self.stdout.write(
+            f'Шаблонов: {len(ok)}, разбор всего {total:.1f} мс.')
+        for timing in failed:
+            self.stderr.write(f'{timing.name}: {timing.error}')
+        if failed:
+            raise CommandError(f'Шаблонов с ошибками: {len(failed)}.')
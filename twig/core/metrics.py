@@ -0,0 +1,257 @@
+"""Лёгкие метрики запросов по представлениям.
+
+MetricsMiddleware для каждого запроса замеряет полное время ответа,
+время и число SQL-запросов, время рендеринга шаблонов и попадания в кэш
+и складывает их в гистограммы своего представления ('posts:index').
+Гистограммы живут в памяти процесса: у каждого воркера свои. Их видно
+сотрудникам на /admin/metrics/ (JSON), а раз в METRICS_LOG_INTERVAL
+секунд сводка пишется в лог 'twig.metrics'.
+
+На запрос приходится несколько вызовов perf_counter и одна блокировка
+при записи в гистограммы, поэтому middleware можно не выключать.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+from .query_budget import view_name_for
+
+logger = logging.getLogger('twig.metrics')
+
+# Верхние границы корзин: миллисекунды и число запросов к базе.
+TIME_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 30, 50, 100)
+PERCENTILES = (50, 95, 99)
+
+_current = threading.local()
+
+
+class Histogram:
+    """Счётчики по корзинам; перцентиль — верхняя граница корзины."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        if not self.total:
+            return 0
+        rank = self.total * percent / 100
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.total,
+            'mean': round(self.sum / self.total, 2) if self.total else 0,
+            'max': round(self.max, 2),
+            **{f'p{percent}': self.percentile(percent)
+               for percent in PERCENTILES},
+            'buckets': dict(zip(
+                [str(bound) for bound in self.buckets] + ['inf'],
+                self.counts,
+            )),
+        }
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.wall_ms = Histogram(TIME_BUCKETS)
+        self.db_ms = Histogram(TIME_BUCKETS)
+        self.queries = Histogram(COUNT_BUCKETS)
+        self.template_ms = Histogram(TIME_BUCKETS)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, sample):
+        self.wall_ms.add(sample.wall_ms)
+        self.db_ms.add(sample.db_ms)
+        self.queries.add(sample.queries)
+        self.template_ms.add(sample.template_ms)
+        self.cache_hits += sample.cache_hits
+        self.cache_misses += sample.cache_misses
+
+    def as_dict(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'wall_ms': self.wall_ms.as_dict(),
+            'db_ms': self.db_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'template_ms': self.template_ms.as_dict(),
+            'cache': {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': (round(self.cache_hits / lookups, 3)
+                             if lookups else None),
+            },
+        }
+
+    def summary(self, name):
+        cache = self.as_dict()['cache']
+        hit_rate = (f'{cache["hit_rate"]:.0%}'
+                    if cache['hit_rate'] is not None else '—')
+        return (
+            f'{name}: {self.wall_ms.total} запр., '
+            f'время p50 {self.wall_ms.percentile(50)} '
+            f'p95 {self.wall_ms.percentile(95)} мс, '
+            f'БД p95 {self.db_ms.percentile(95)} мс, '
+            f'SQL p95 {self.queries.percentile(95)}, '
+            f'шаблоны p95 {self.template_ms.percentile(95)} мс, '
+            f'кэш {hit_rate}'
+        )
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.last_log = time.monotonic()
+
+    def add(self, name, sample):
+        with self.lock:
+            self.views.setdefault(name, ViewMetrics()).add(sample)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: metrics.as_dict()
+                for name, metrics in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def log_due(self, interval):
+        """True раз в interval секунд — только одному из потоков."""
+        now = time.monotonic()
+        with self.lock:
+            if not interval or now - self.last_log < interval:
+                return False
+            self.last_log = now
+            return True
+
+    def log(self):
+        with self.lock:
+            lines = [
+                metrics.summary(name)
+                for name, metrics in sorted(self.views.items())
+            ]
+        for line in lines:
+            logger.info(line)
+
+
+registry = Registry()
+
+
+class Sample:
+    """Метрики одного запроса, которые копятся по ходу его обработки."""
+
+    def __init__(self):
+        self.wall_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+
+def current():
+    return getattr(_current, 'sample', None)
+
+
+def count_cache(hits, misses=0):
+    """Учитывает обращения к кэшу в метриках текущего запроса."""
+    sample = current()
+    if sample is not None:
+        sample.cache_hits += hits
+        sample.cache_misses += misses
+
+
+class TimedTemplate:
+    """Шаблон движка Django, время рендеринга которого идёт в метрики."""
+
+    def __init__(self, template):
+        # Не self.template: у шаблона бэкенда так называется шаблон
+        # движка, и его читают снаружи (select_template().template).
+        self.wrapped = template
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def render(self, context=None, request=None):
+        sample = current()
+        if sample is None:
+            return self.wrapped.render(context, request)
+        # Вложенный render_to_string (карточки постов) уже входит
+        # во время внешнего шаблона.
+        sample.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return self.wrapped.render(context, request)
+        finally:
+            sample.template_depth -= 1
+            if not sample.template_depth:
+                sample.template_ms += (time.perf_counter() - started) * 1000
+
+
+class Templates(DjangoTemplates):
+    """Бэкенд шаблонов Django с замером времени рендеринга."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = _current.sample = Sample()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            _current.sample = None
+        sample.wall_ms = (time.perf_counter() - started) * 1000
+        # Пути ненайденных страниц не должны плодить гистограммы.
+        name = (view_name_for(request)
+                if getattr(request, 'resolver_match', None) else 'unresolved')
+        registry.add(name, sample)
+        if registry.log_due(getattr(settings, 'METRICS_LOG_INTERVAL', 60)):
+            registry.log()
+        return response
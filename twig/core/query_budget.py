@@ -0,0 +1,103 @@
+"""Ограничение числа SQL-запросов на страницу.
+
+query_budget() — контекстный менеджер для тестов: падает, если внутри
+выполнено больше запросов, чем разрешено. QueryBudgetMiddleware делает
+то же для каждого запроса в работающем приложении: пишет предупреждение
+в лог или (QUERY_BUDGET_MODE = 'raise') выбрасывает исключение. Тексты
+запросов middleware хранит только при DEBUG или в режиме 'raise', иначе
+только считает их.
+
+Бюджеты задаются в settings.QUERY_BUDGETS по имени представления
+('posts:index'), по умолчанию — QUERY_BUDGET_DEFAULT.
+"""
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('twig.query_budget')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая запросы на всех соединениях.
+
+    keep_sql=False — только счётчик, без списка текстов запросов.
+    """
+
+    def __init__(self, keep_sql=True):
+        self.count = 0
+        self.queries = [] if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if self.queries is not None:
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return self.count
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+def exceeded_message(label, limit, counter):
+    message = f'{label}: {len(counter)} SQL-запросов при бюджете {limit}'
+    if counter.queries is None:
+        return message
+    queries = '\n'.join(
+        f'{number}. {sql}' for number, sql in enumerate(counter.queries, 1)
+    )
+    return f'{message}\n{queries}'
+
+
+@contextmanager
+def query_budget(limit, label='Блок кода'):
+    """Падает, если внутри блока выполнено больше limit запросов."""
+    counter = QueryCounter()
+    with counter.capture():
+        yield counter
+    if len(counter) > limit:
+        raise QueryBudgetExceeded(exceeded_message(label, limit, counter))
+
+
+def view_name_for(request):
+    """Имя представления по app_name ('posts:index'), а не по namespace."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path
+    return ':'.join(match.app_names + [match.url_name or match.view_name])
+
+
+def budget_for(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT',
+                                          None))
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        strict = getattr(settings, 'QUERY_BUDGET_MODE', 'log') == 'raise'
+        counter = QueryCounter(keep_sql=settings.DEBUG or strict)
+        with counter.capture():
+            response = self.get_response(request)
+        view_name = view_name_for(request)
+        limit = budget_for(view_name)
+        if limit is not None and len(counter) > limit:
+            message = exceeded_message(view_name, limit, counter)
+            if strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
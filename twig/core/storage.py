@@ -0,0 +1,25 @@
+"""Хранилище статики для профиля prod."""
+import logging
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+logger = logging.getLogger('twig.static')
+
+
+class ManifestStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени файла.
+
+    Файлы из манифеста collectstatic отдаются под именами вида
+    bootstrap.min.3f2a….css, и им можно ставить вечный Cache-Control.
+    Если шаблон ссылается на файл, которого нет в манифесте, страница
+    не падает с ошибкой 500: ссылка остаётся без хэша, а в лог пишется
+    предупреждение.
+    """
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            logger.warning('Статического файла %s нет в манифесте', name)
+            return FileSystemStorage.url(self, name)
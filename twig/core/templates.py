@@ -0,0 +1,102 @@
+"""Прогрев кэша шаблонов.
+
+С кэширующим загрузчиком (профиль prod, twig/settings/prod.py) шаблон
+читается с диска и разбирается один раз на процесс — при первом
+запросе, который его использует. warm_templates() делает это заранее
+для всех шаблонов проекта и приложений, заодно находя синтаксические
+ошибки до того, как на них наткнётся посетитель.
+"""
+import logging
+import os
+import time
+import warnings
+
+from django.template import Context, engines
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+logger = logging.getLogger('twig.templates')
+
+
+class TemplateTiming:
+    """Время загрузки и рендеринга одного шаблона в миллисекундах."""
+
+    def __init__(self, name):
+        self.name = name
+        self.parse_ms = 0.0
+        self.render_ms = None
+        self.error = None
+        self.render_error = None
+
+
+def template_dirs(engine):
+    """Каталоги, в которых ищут шаблоны загрузчики движка, по порядку."""
+    dirs = []
+    for loader in engine.template_loaders:
+        # Кэширующий загрузчик сам ничего не читает, а оборачивает другие.
+        for inner in getattr(loader, 'loaders', [loader]):
+            dirs += [path for path in inner.get_dirs() if path not in dirs]
+    return dirs
+
+
+def template_names(engine):
+    """Имена всех шаблонов движка; первые по порядку поиска перекрывают."""
+    names = []
+    seen = set()
+    for directory in template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if not filename.endswith(TEMPLATE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+    return names
+
+
+def warm_templates(render=False, using='django'):
+    """Загружает (и при render=True рендерит) все шаблоны.
+
+    Возвращает список TemplateTiming. Ошибка рендеринга с пустым
+    контекстом не считается ошибкой шаблона: многим шаблонам нужны
+    данные представления.
+    """
+    engine = engines[using].engine
+    timings = []
+    for name in template_names(engine):
+        timing = TemplateTiming(name)
+        started = time.perf_counter()
+        try:
+            template = engine.get_template(name)
+        except Exception as error:
+            timing.error = f'{type(error).__name__}: {error}'
+            timings.append(timing)
+            continue
+        timing.parse_ms = (time.perf_counter() - started) * 1000
+        if render:
+            started = time.perf_counter()
+            try:
+                with warnings.catch_warnings():
+                    # Например, {% csrf_token %} без запроса в контексте.
+                    warnings.simplefilter('ignore')
+                    template.render(Context())
+                timing.render_ms = (time.perf_counter() - started) * 1000
+            except Exception as error:
+                timing.render_error = f'{type(error).__name__}: {error}'
+        timings.append(timing)
+    return timings
+
+
+def warm_up():
+    """Прогрев при старте процесса: ошибки шаблонов пишутся в лог."""
+    started = time.perf_counter()
+    timings = warm_templates()
+    for timing in timings:
+        if timing.error:
+            logger.error('Шаблон %s не загружается: %s',
+                         timing.name, timing.error)
+    logger.info('Загружено шаблонов: %d за %.0f мс', len(timings),
+                (time.perf_counter() - started) * 1000)
+    return timings
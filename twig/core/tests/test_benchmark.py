@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from ..benchmark import measure
+
+
+class MeasureTests(SimpleTestCase):
+    def test_result(self):
+        result = measure('time:sleep', 0)
+        self.assertGreater(result['peak_kb'], 0)
+        self.assertEqual(
+            result['delta_kb'], result['peak_kb'] - result['baseline_kb'])
+
+    def test_exception_in_child(self):
+        """Исключение в процессе замера передаётся родителю."""
+        with self.assertRaisesMessage(RuntimeError, 'ZeroDivisionError'):
+            measure('operator:truediv', 1, 0)
+
+    def test_child_exit_without_result(self):
+        """Процесс, умерший без результата, не вешает замер."""
+        with self.assertRaisesMessage(RuntimeError, 'кодом 3'):
+            measure('os:_exit', 3)
+
+    def test_timeout(self):
+        with self.assertRaisesMessage(RuntimeError, 'не уложился'):
+            measure('time:sleep', 30, timeout=1)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        options.setdefault('CULL_CHECK_EVERY', 1)
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_set_get_delete(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 2})
+
+    def test_shared_between_instances(self):
+        """Второй экземпляр (другой процесс) видит те же записи."""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.make_cache().get('key'), 'value')
+
+    def test_expiry_add_incr(self):
+        self.cache.set('gone', 1, timeout=0)
+        self.assertIsNone(self.cache.get('gone'))
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_lru_eviction_by_entries(self):
+        """Вытесняются записи, к которым давно не обращались."""
+        cache = self.make_cache(MAX_ENTRIES=2, CULL_FREQUENCY=0,
+                                TOUCH_INTERVAL=0)
+        cache.set('old', 1)
+        cache.set('fresh', 2)
+        time.sleep(0.01)
+        cache.get('old')
+        cache.set('new', 3)
+        self.assertEqual(cache.get_many(['old', 'fresh', 'new']),
+                         {'old': 1, 'new': 3})
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_eviction_by_size(self):
+        cache = self.make_cache(MAX_SIZE=3000)
+        for index in range(5):
+            cache.set(f'blob{index}', b'x' * 1000)
+        stats = cache.stats()
+        self.assertLessEqual(stats['size'], 3000)
+        self.assertGreaterEqual(stats['evictions'], 2)
+        self.assertIsNotNone(cache.get('blob4'))
+
+    def test_hit_miss_counters(self):
+        self.cache.set('key', 1)
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
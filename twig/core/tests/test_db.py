@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase)
+from django.test.utils import override_settings
+
+from posts.models import Post
+
+from .. import db
+from ..management.commands.sync_replica import copy_database
+
+
+@mock.patch('core.db.replica_aliases', return_value=['replica'])
+class ReadWriteRouterTests(TransactionTestCase):
+    router = db.ReadWriteRouter()
+
+    def setUp(self):
+        db.reset()
+
+    def test_reads_go_to_replica(self, replicas):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_atomic_block_reads_own_writes(self, replicas):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_after_write_go_to_primary(self, replicas):
+        self.router.db_for_write(Post)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        db.reset()
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+
+@override_settings(DATABASE_PRIMARY_STICKY_SECONDS=10)
+@mock.patch('core.db.replica_aliases', return_value=['replica'])
+class PrimaryStickyMiddlewareTests(SimpleTestCase):
+    router = db.ReadWriteRouter()
+
+    def view(self, request):
+        self.read_from = self.router.db_for_read(Post)
+        if request.method == 'POST':
+            self.router.db_for_write(Post)
+        return HttpResponse()
+
+    def test_write_pins_user_to_primary(self, replicas):
+        middleware = db.PrimaryStickyMiddleware(self.view)
+        factory = RequestFactory()
+        response = middleware(factory.get('/'))
+        self.assertEqual(self.read_from, 'replica')
+        self.assertNotIn(db.STICKY_COOKIE, response.cookies)
+
+        response = middleware(factory.post('/'))
+        cookie = response.cookies[db.STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = factory.get('/')
+        request.COOKIES[db.STICKY_COOKIE] = cookie.value
+        middleware(request)
+        self.assertEqual(self.read_from, 'default')
+
+        request.COOKIES[db.STICKY_COOKIE] = str(int(time.time()) - 1)
+        middleware(request)
+        self.assertEqual(self.read_from, 'replica')
+
+
+class RouterSettingsTests(SimpleTestCase):
+    def test_replicas_must_be_configured(self):
+        # В тестовом профиле реплик нет, всё читается из default.
+        with override_settings(DATABASE_REPLICAS=['read', 'replica']):
+            self.assertEqual(db.replica_aliases(), [])
+        self.assertEqual(db.ReadWriteRouter().db_for_read(Post), 'default')
+
+    def test_migrate_only_default(self):
+        router = db.ReadWriteRouter()
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+
+class SyncReplicaTests(SimpleTestCase):
+    def test_replica_catches_up(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary = os.path.join(directory, 'primary.sqlite3')
+            replica = os.path.join(directory, 'replica.sqlite3')
+            with sqlite3.connect(primary) as conn:
+                conn.execute('PRAGMA journal_mode = wal')
+                conn.execute('CREATE TABLE post (text TEXT)')
+                conn.execute("INSERT INTO post VALUES ('первый')")
+            copy_database(primary, replica)
+            with sqlite3.connect(primary) as conn:
+                conn.execute("INSERT INTO post VALUES ('второй')")
+            reader = sqlite3.connect(f'file:{replica}?mode=ro', uri=True)
+            count = 'SELECT count(*) FROM post'
+            self.assertEqual(reader.execute(count).fetchone(), (1,))
+            copy_database(primary, replica)
+            self.assertEqual(reader.execute(count).fetchone(), (2,))
+            reader.close()
+
+
+class PragmaTests(TestCase):
+    def test_connection_configured(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                settings.SQLITE_PRAGMAS['busy_timeout'],
+            )
@@ -0,0 +1,73 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..metrics import Histogram, TIME_BUCKETS, registry
+
+User = get_user_model()
+
+
+class HistogramTests(TestCase):
+    def test_percentiles_by_bucket(self):
+        histogram = Histogram(TIME_BUCKETS)
+        for value in [0.5] * 90 + [40] * 9 + [7000]:
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(95), 50)
+        self.assertEqual(histogram.percentile(100), 7000)
+        self.assertEqual(histogram.as_dict()['buckets']['inf'], 1)
+
+
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_view_metrics_collected(self):
+        self.client.force_login(self.author)
+        self.client.get(reverse('post:index'))
+        self.client.get(reverse('post:index'))
+        self.client.logout()
+        self.client.get(reverse('post:index'))
+        self.client.get(reverse('post:index'))
+
+        index = registry.snapshot()['posts:index']
+        self.assertEqual(index['wall_ms']['count'], 4)
+        self.assertGreater(index['queries']['max'], 0)
+        self.assertGreater(index['db_ms']['mean'], 0)
+        self.assertGreater(index['template_ms']['mean'], 0)
+        # Анонимная страница во второй раз берётся из кэша страниц,
+        # карточки у залогиненного — во второй раз тоже.
+        self.assertGreaterEqual(index['cache']['hits'], 2)
+        self.assertGreaterEqual(index['cache']['misses'], 2)
+
+    def test_unknown_paths_share_one_histogram(self):
+        self.client.get('/no-such-page/')
+        self.client.get('/another-missing-page/')
+        self.assertEqual(
+            registry.snapshot()['unresolved']['wall_ms']['count'], 2)
+
+    def test_endpoint_for_staff_only(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        self.client.get(reverse('post:index'))
+        data = self.client.get(url).json()
+        self.assertIn('posts:index', data)
+
+    @override_settings(METRICS_LOG_INTERVAL=1e-9)
+    def test_periodic_log(self):
+        with self.assertLogs('twig.metrics', logging.INFO) as logs:
+            self.client.get(reverse('post:index'))
+        self.assertIn('posts:index', logs.output[0])
@@ -0,0 +1,34 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts.models import Post
+
+from ..query_budget import QueryBudgetExceeded, QueryBudgetMiddleware
+
+
+def two_queries(request):
+    Post.objects.exists()
+    Post.objects.count()
+    return HttpResponse()
+
+
+@override_settings(QUERY_BUDGET_DEFAULT=1)
+class QueryBudgetMiddlewareTests(SimpleTestCase):
+    databases = {'default'}
+
+    def run_view(self):
+        middleware = QueryBudgetMiddleware(two_queries)
+        return middleware(RequestFactory().get('/budget/'))
+
+    @override_settings(QUERY_BUDGET_MODE='log', DEBUG=False)
+    def test_log_mode_counts_only(self):
+        """Без DEBUG в лог попадает только число запросов."""
+        with self.assertLogs('twig.query_budget', 'WARNING') as logs:
+            self.run_view()
+        self.assertIn('2 SQL-запросов при бюджете 1', logs.output[0])
+        self.assertNotIn('SELECT', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_MODE='raise', DEBUG=False)
+    def test_raise_mode_lists_queries(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'SELECT'):
+            self.run_view()
@@ -0,0 +1,20 @@
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..storage import ManifestStorage
+
+
+class ManifestStorageTests(SimpleTestCase):
+    def test_hashed_and_missing_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, 'staticfiles.json'), 'w') as file:
+                json.dump({'paths': {'app.css': 'app.abc123.css'},
+                           'version': '1.0'}, file)
+            storage = ManifestStorage(location=root, base_url='/static/')
+            self.assertEqual(storage.url('app.css'), '/static/app.abc123.css')
+            with self.assertLogs('twig.static', 'WARNING'):
+                self.assertEqual(
+                    storage.url('missing.ico'), '/static/missing.ico')
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templates import warm_templates
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+
+class WarmTemplatesTests(SimpleTestCase):
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_cached_loader_warmed(self):
+        """После прогрева шаблоны проекта и приложений уже в кэше."""
+        timings = {timing.name: timing for timing in warm_templates()}
+        self.assertIsNone(timings['posts/index.html'].error)
+        self.assertIn('admin/base.html', timings)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('posts/index.html', loader.get_template_cache)
+
+    def test_broken_template_reported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.html'), 'w') as file:
+                file.write('{% if %}')
+            templates = [{**settings.TEMPLATES[0], 'DIRS': [directory]}]
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaisesMessage(CommandError, 'ошибками: 1'):
+                    call_command(
+                        'warm_templates', stdout=StringIO(),
+                        stderr=StringIO(),
+                    )
@@ -0,0 +1,329 @@
+"""Кэш страниц с версиями, которые сбрасываются сигналами моделей.
+
+Каждая кэшируемая страница относится к области (scope): 'index',
+'group:<slug>', 'profile:<username>', 'post:<id>', 'feed:<id читателя>'.
+У области есть версия в кэше; ключ страницы включает версию, поэтому
+изменение поста или комментария мгновенно делает старые страницы
+недоступными, а пока ничего не меняется, страницы живут
+PAGE_CACHE_TIMEOUT секунд.
+
+Страница поста показывает ещё имя и счётчик постов автора и название
+группы, поэтому зависит и от областей 'author:<id>' и 'group_id:<id>'
+(post_page_scopes). Их сбрасывают новые и удалённые посты автора,
+переименование пользователя и группы.
+
+При промахе страницу пересчитывает только тот процесс, который успел
+взять блокировку; остальные отдают последнюю готовую копию.
+
+Версии — это метки времени последнего изменения в миллисекундах, поэтому
+из них же получаются валидаторы условного GET (conditional_page): ETag
+и Last-Modified считаются без запросов к базе и без шаблонов.
+
+Внутри транзакции bump() меняет версию сразу и ещё раз после коммита:
+страница, которую другой запрос успел собрать по ещё не закоммиченным
+данным, не переживёт второй смены версии.
+
+Реплика базы может ещё не видеть изменение, которое уже сменило
+версию. Поэтому в течение DATABASE_PRIMARY_STICKY_SECONDS после смены
+версии страница собирается по default (core.db.primary_reads), иначе
+старые данные попали бы в кэш под новой версией.
+
+Версии живут в кэше default, поэтому сброс виден только процессам,
+которые делят этот кэш. С locmem (CACHE_BACKEND по умолчанию) у каждого
+процесса свои версии и страницы: изменение, сделанное в одном воркере,
+другие увидят только через PAGE_CACHE_TIMEOUT. Если воркеров несколько,
+нужен общий кэш (CACHE_BACKEND=sqlite или file).
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core import db
+from core.metrics import count_cache
+
+from .models import Comment, Post
+
+VERSION_KEY = 'posts:version:{}'
+PAGE_KEY = 'posts:page:{}:{}:{}'
+STALE_KEY = 'posts:page:{}:stale:{}'
+LOCK_KEY = 'posts:lock:{}:{}'
+CARD_KEY = 'posts:card:{}:{}'
+POST_SCOPES_KEY = 'posts:scopes:{}'
+LOCK_TIMEOUT = 30
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60)
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def safe(scope):
+    """Ключ из ASCII: слаги и имена пользователей бывают кириллицей."""
+    return quote(scope, safe=':')
+
+
+def version(scope):
+    """Текущая версия области; при отсутствии заводится новая."""
+    key = VERSION_KEY.format(safe(scope))
+    value = cache.get(key)
+    if value is None:
+        # Версия из текущего времени не совпадёт ни с одной из прежних,
+        # даже если старое значение было вытеснено из кэша.
+        cache.add(key, now_ms(), None)
+        value = cache.get(key)
+    return value
+
+
+def render(view, request, args, kwargs, versions):
+    """Вызывает view; читает из default, если версия сменилась недавно
+    и реплика могла ещё не догнать изменение.
+
+    versions — функция без аргументов, возвращающая версии областей.
+    """
+    window = db.sticky_seconds() * 1000
+    if window and now_ms() - max(versions()) < window:
+        with db.primary_reads():
+            return view(request, *args, **kwargs)
+    return view(request, *args, **kwargs)
+
+
+def bump(*scopes):
+    """Меняет версии областей, делая их закэшированные страницы устаревшими.
+
+    В транзакции версии меняются ещё раз после коммита.
+    """
+    keys = [VERSION_KEY.format(safe(scope)) for scope in scopes]
+    set_versions(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: set_versions(keys))
+
+
+def set_versions(keys):
+    current = cache.get_many(keys)
+    stamp = now_ms()
+    cache.set_many(
+        {key: max(stamp, current.get(key, 0) + 1) for key in keys},
+        None,
+    )
+
+
+def post_scopes(post, group_slug=None):
+    """Области, на страницах которых виден пост.
+
+    author:<id> — счётчик постов автора на страницах других его постов.
+    """
+    scopes = [
+        'index', f'profile:{post.author.username}', f'post:{post.pk}',
+        f'author:{post.author_id}',
+    ]
+    if post.group_id:
+        scopes.append(f'group:{post.group.slug}')
+    if group_slug:
+        scopes.append(f'group:{group_slug}')
+    return scopes
+
+
+def post_page_scopes(post_id):
+    """Области автора и группы поста, от которых зависит его страница.
+
+    Берутся из кэша, чтобы ключ страницы и ETag считались без запросов;
+    при промахе — один запрос. Правка поста сбрасывает запись
+    (forget_post_page_scopes): у поста могла смениться группа.
+    """
+    key = POST_SCOPES_KEY.format(post_id)
+    scopes = cache.get(key)
+    if scopes is None:
+        row = Post.objects.filter(pk=post_id).values_list(
+            'author_id', 'group_id').first()
+        scopes = []
+        if row is not None:
+            author_id, group_id = row
+            scopes.append(f'author:{author_id}')
+            if group_id:
+                scopes.append(f'group_id:{group_id}')
+        cache.set(key, scopes, page_timeout())
+    return scopes
+
+
+def forget_post_page_scopes(post_id):
+    cache.delete(POST_SCOPES_KEY.format(post_id))
+
+
+def user_scopes(user, old_username=None):
+    """Области, где видны имя пользователя: его профиль, страницы его
+    постов, ленты и группы с его постами и посты с его комментариями."""
+    scopes = {'index', f'author:{user.pk}', f'profile:{user.username}'}
+    if old_username:
+        scopes.add(f'profile:{old_username}')
+    scopes.update(
+        f'group:{slug}' for slug in Post.objects.filter(
+            author=user, group__isnull=False,
+        ).values_list('group__slug', flat=True).distinct()
+    )
+    scopes.update(
+        f'post:{post_id}' for post_id in Comment.objects.filter(
+            author=user).values_list('post_id', flat=True).distinct()
+    )
+    return sorted(scopes)
+
+
+def group_scopes(group, old_slug=None):
+    """Области, где видно название группы: её страница, лента, страницы
+    её постов и профили их авторов."""
+    scopes = {'index', f'group:{group.slug}', f'group_id:{group.pk}'}
+    if old_slug:
+        scopes.add(f'group:{old_slug}')
+    scopes.update(
+        f'profile:{username}' for username in Post.objects.filter(
+            group_id=group.pk).values_list(
+            'author__username', flat=True).distinct()
+    )
+    return sorted(scopes)
+
+
+def follow_scopes(follow):
+    """Области, которые меняет подписка: лента и счётчики в профилях."""
+    return [
+        f'feed:{follow.user_id}',
+        f'profile:{follow.user.username}',
+        f'profile:{follow.author.username}',
+    ]
+
+
+def card_timeout():
+    return getattr(settings, 'POST_CARD_TIMEOUT', 24 * 60 * 60)
+
+
+def pending_card_timeout():
+    """Срок карточки, у которой картинка ещё обрабатывается."""
+    return getattr(settings, 'POST_PENDING_CARD_TIMEOUT', 60)
+
+
+def card_key(post, *options):
+    """Ключ карточки поста по всему, что в неё попадает.
+
+    Правка поста, смена имени автора или названия группы дают новый
+    ключ, и старая карточка просто перестаёт читаться.
+    """
+    author, group = post.author, post.group
+    parts = [
+        post.text, post.pub_date.isoformat(), post.image.name,
+        author.username, author.get_full_name(),
+        group and group.slug, group and group.title, *options,
+    ]
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return CARD_KEY.format(post.pk, digest)
+
+
+def cached_page(scope, related=None):
+    """Кэширует страницу для анонимных посетителей в области scope.
+
+    scope — строка формата, в которую подставляются аргументы из URL,
+    например 'group:{slug}'. related(**kwargs) — ещё области, от которых
+    зависит страница (их версии тоже входят в ключ).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            name = scope.format(**kwargs)
+            area = safe(name)
+            path = hashlib.md5(
+                request.get_full_path().encode()
+            ).hexdigest()
+            names = [name] + (related(**kwargs) if related else [])
+            current = [version(item) for item in names]
+            key = PAGE_KEY.format(
+                area, '.'.join(map(str, current)), path)
+            cached = cache.get(key)
+            if cached is not None:
+                count_cache(1)
+                return build_response(cached)
+            lock = LOCK_KEY.format(area, path)
+            if not cache.add(lock, 1, LOCK_TIMEOUT):
+                stale = cache.get(STALE_KEY.format(area, path))
+                if stale is not None:
+                    count_cache(1)
+                    return build_response(stale)
+                count_cache(0, 1)
+                return view(request, *args, **kwargs)
+            count_cache(0, 1)
+            try:
+                response = render(
+                    view, request, args, kwargs, lambda: current)
+                if response.status_code == 200 and not response.streaming:
+                    payload = (response.content, list(response.items()))
+                    cache.set_many({
+                        key: payload,
+                        STALE_KEY.format(area, path): payload,
+                    }, page_timeout())
+            finally:
+                cache.delete(lock)
+            return response
+        return wrapper
+    return decorator
+
+
+def build_response(payload):
+    """Ответ из закэшированных содержимого и заголовков."""
+    content, headers = payload
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def conditional_page(*scopes, related=None):
+    """Отвечает 304 Not Modified, если версии областей не менялись.
+
+    scopes — строки формата с аргументами из URL и {user} (id текущего
+    пользователя), например 'feed:{user}'; related — как у cached_page.
+    ETag зависит ещё от адреса, пользователя и CSRF-cookie, которые
+    попадают в разметку страницы. Last-Modified отдаётся только анонимам:
+    для вошедших страница зависит не только от времени изменения.
+    """
+    def versions(request, kwargs):
+        names = [
+            scope.format(user=request.user.pk, **kwargs) for scope in scopes
+        ]
+        if related:
+            names += related(**kwargs)
+        return [version(name) for name in names]
+
+    def etag(request, *args, **kwargs):
+        parts = versions(request, kwargs) + [
+            request.get_full_path(),
+            request.user.pk,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        ]
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        stamp = max(versions(request, kwargs)) / 1000
+        return datetime.fromtimestamp(stamp, timezone.utc)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # ETag считается по новой версии: и тело под ним не должно
+            # быть прочитано из отстающей реплики.
+            return render(
+                view, request, args, kwargs,
+                lambda: versions(request, kwargs))
+        return vary_on_cookie(condition(etag, last_modified)(wrapper))
+    return decorator
@@ -0,0 +1,103 @@
+"""Денормализованные счётчики постов, подписчиков и комментариев.
+
+Счётчики меняются сигналами при создании и удалении Post, Comment и
+Follow через UPDATE ... SET x = x + 1, поэтому параллельные запросы не
+теряют изменения. Комментарии с active=False не учитываются.
+reconcile() пересчитывает всё заново — на случай bulk-операций и
+ручных правок в базе.
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, Profile, User
+
+
+def shifted(field, delta):
+    """F(field) + delta, не опускающийся ниже нуля."""
+    if delta < 0:
+        return Greatest(F(field) + delta, 0)
+    return F(field) + delta
+
+
+def update_profile(user_id, **deltas):
+    """Сдвигает счётчики профиля.
+
+    Профиль создаётся, только если счётчики растут: при каскадном
+    удалении пользователя обработчики удаления его постов и подписок
+    срабатывают, когда профиля уже нет, и воскрешать его незачем.
+    """
+    changes = {
+        field: shifted(field, delta) for field, delta in deltas.items()
+    }
+    with transaction.atomic():
+        if Profile.objects.filter(user_id=user_id).update(**changes):
+            return
+        if any(delta < 0 for delta in deltas.values()):
+            return
+        if not User.objects.filter(pk=user_id).exists():
+            return
+        Profile.objects.get_or_create(user_id=user_id)
+        Profile.objects.filter(user_id=user_id).update(**changes)
+
+
+def update_post(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=shifted('comments_count', delta)
+    )
+
+
+def count_of(queryset, field):
+    """Подзапрос с числом строк queryset для OuterRef('pk')."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def reconcile():
+    """Пересчитывает все счётчики; возвращает число исправленных строк."""
+    with transaction.atomic():
+        Profile.objects.bulk_create(
+            (
+                Profile(user_id=user_id)
+                for user_id in User.objects.filter(
+                    profile__isnull=True
+                ).values_list('pk', flat=True).iterator()
+            ),
+            batch_size=500,
+        )
+        profiles = Profile.objects.annotate(
+            actual_posts=count_of(Post.objects.all(), 'author'),
+            actual_followers=count_of(Follow.objects.all(), 'author'),
+            actual_following=count_of(Follow.objects.all(), 'user'),
+        )
+        posts = Post.objects.annotate(
+            actual_comments=count_of(
+                Comment.objects.filter(active=True), 'post'
+            ),
+        )
+        drifted = (
+            profiles.exclude(
+                posts_count=F('actual_posts'),
+                followers_count=F('actual_followers'),
+                following_count=F('actual_following'),
+            ).count()
+            + posts.exclude(comments_count=F('actual_comments')).count()
+        )
+        Profile.objects.update(
+            posts_count=count_of(Post.objects.all(), 'author'),
+            followers_count=count_of(Follow.objects.all(), 'author'),
+            following_count=count_of(Follow.objects.all(), 'user'),
+        )
+        Post.objects.update(
+            comments_count=count_of(
+                Comment.objects.filter(active=True), 'post'
+            ),
+        )
+    return drifted
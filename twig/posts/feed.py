@@ -0,0 +1,219 @@
+"""Лента подписок с раскладкой постов по входящим подписчиков.
+
+При публикации пост копируется (id, автор, дата) во входящую ленту
+каждого подписчика, поэтому чтение ленты — это выборка по индексу
+(user, -pub_date, -post), а не соединение Follow и Post. Посты
+авторов, у которых подписчиков больше FEED_FANOUT_MAX_FOLLOWERS, не
+раскладываются: гибридный режим подмешивает их при чтении (FeedPaginator
+сливает обе выборки по общему ключу (pub_date, id поста)).
+
+Когда число подписчиков переходит порог, followers_changed() переводит
+автора между режимами: ставший популярным убирается из входящих, а
+переставший — раскладывается по ним заново, поэтому ни один пост не
+теряется и не показывается дважды.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import FeedEntry, Follow, Post, Profile
+from .paginators import CursorPaginator
+
+FEED_ORDERING = ('-pub_date', '-pk')
+ENTRY_ORDERING = ('-pub_date', '-post_id')
+FANOUT_BATCH_SIZE = 500
+
+
+def fanout_enabled():
+    return getattr(settings, 'FEED_FANOUT', False)
+
+
+def max_followers():
+    return getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', None)
+
+
+def followers_count(author_id):
+    return Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first() or 0
+
+
+def is_prolific(author_id):
+    """Автор, чьи посты подмешиваются при чтении, а не раскладываются."""
+    limit = max_followers()
+    if limit is None:
+        return False
+    return followers_count(author_id) > limit
+
+
+def followers_changed(author_id, delta):
+    """Меняет режим автора, если число подписчиков перешло порог.
+
+    delta — на сколько изменилось число подписчиков (уже учтённое).
+    """
+    limit = max_followers()
+    if limit is None:
+        return
+    count = followers_count(author_id)
+    if count - delta <= limit < count:
+        FeedEntry.objects.filter(author_id=author_id).delete()
+    elif count <= limit < count - delta:
+        fill_inboxes(author_id)
+
+
+def fan_out_post(post):
+    """Кладёт новый пост во входящие ленты подписчиков автора."""
+    if is_prolific(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(follow):
+    """Заполняет ленту подписчика постами автора после подписки."""
+    if is_prolific(follow.author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=follow.author_id
+    ).values_list('pk', 'pub_date')
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=follow.user_id,
+                post_id=post_id,
+                author_id=follow.author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts.iterator()
+        ),
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(follow):
+    """Удаляет посты автора из ленты после отписки."""
+    FeedEntry.objects.filter(
+        user_id=follow.user_id,
+        author_id=follow.author_id,
+    ).delete()
+
+
+def fill_inboxes(author_id=None):
+    """Раскладывает посты по лентам подписчиков одним INSERT ... SELECT.
+
+    Нужна после bulk-вставок (импорт, наполнение базы), которые обходят
+    сигналы, и когда автор перестаёт быть популярным (author_id — только
+    его посты); уже разложенные посты не дублируются. Все строки
+    перекладывает сама база, и память процесса не зависит от их числа.
+    """
+    entry, follow, post, profile = (
+        model._meta.db_table for model in (FeedEntry, Follow, Post, Profile)
+    )
+    limit = max_followers()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {entry} (user_id, post_id, author_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM {follow} f '
+            f'JOIN {post} p ON p.author_id = f.author_id '
+            f'JOIN {profile} a ON a.user_id = f.author_id '
+            f'WHERE (%s IS NULL OR a.followers_count <= %s) '
+            f'AND (%s IS NULL OR f.author_id = %s) '
+            f'AND NOT EXISTS (SELECT 1 FROM {entry} e '
+            f'WHERE e.user_id = f.user_id AND e.post_id = p.id)',
+            [limit, limit, author_id, author_id],
+        )
+
+
+def rebuild(user=None):
+    """Пересобирает входящие ленты (всех пользователей или одного)."""
+    if user is None:
+        FeedEntry.objects.all().delete()
+        fill_inboxes()
+        return
+    FeedEntry.objects.filter(user=user).delete()
+    for follow in Follow.objects.filter(user=user).iterator():
+        backfill(follow)
+
+
+def prolific_authors(user):
+    """Авторы из подписок пользователя, которых читаем напрямую."""
+    limit = max_followers()
+    if limit is None:
+        return []
+    return list(
+        Follow.objects.filter(
+            user=user, author__profile__followers_count__gt=limit
+        ).values_list('author_id', flat=True)
+    )
+
+
+def follow_feed(user, prolific=None):
+    """Посты авторов, на которых подписан пользователь.
+
+    Для ?page=N со смещением; страницы по курсору читает FeedPaginator.
+    prolific — уже известный список prolific_authors(user).
+    """
+    if not fanout_enabled():
+        return Post.objects.filter(author__following__user=user)
+    condition = Q(
+        pk__in=FeedEntry.objects.filter(user=user).values('post_id')
+    )
+    if prolific is None:
+        prolific = prolific_authors(user)
+    if prolific:
+        condition |= Q(author_id__in=prolific)
+    return Post.objects.filter(condition)
+
+
+class FeedPaginator(CursorPaginator):
+    """Лента подписок: входящие по индексу плюс посты популярных авторов.
+
+    Обе выборки упорядочены по (pub_date, id поста) и берутся с одного
+    курсора, затем сливаются; в странице не больше per_page постов.
+    """
+
+    def __init__(self, user, per_page):
+        prolific = prolific_authors(user)
+        super().__init__(
+            follow_feed(user, prolific).with_related(), per_page,
+            FEED_ORDERING)
+        self.entries = FeedEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group')
+        self.prolific = None
+        if prolific:
+            self.prolific = Post.objects.with_related().filter(
+                author_id__in=prolific)
+
+    def fetch(self, values, backward, limit):
+        posts = [
+            entry.post for entry in self.fetch_from(
+                self.entries, ENTRY_ORDERING, values, backward, limit)
+        ]
+        if self.prolific is not None:
+            posts += self.fetch_from(
+                self.prolific, FEED_ORDERING, values, backward, limit)
+        posts.sort(key=lambda post: (post.pub_date, post.pk),
+                   reverse=not backward)
+        return posts[:limit]
+
+
+def paginator(user, per_page):
+    """Постраничный вывод ленты подписок пользователя."""
+    if not fanout_enabled():
+        return CursorPaginator(follow_feed(user).with_related(), per_page)
+    return FeedPaginator(user, per_page)
@@ -2,6 +2,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
 from django import forms
 from .models import Post, Comment
+from .uploads import normalize_image
 
 User = get_user_model()
 
@@ -17,6 +18,10 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        """Ограничивает размер картинки и убирает из неё EXIF."""
+        return normalize_image(self.cleaned_data.get('image'))
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,355 @@
+"""Миниатюры картинок постов, которые готовятся вне запроса.
+
+После сохранения поста с новой картинкой все размеры из
+POST_THUMBNAIL_SIZES считаются в фоновом пуле потоков. Шаблоны только
+спрашивают у хранилища sorl, готова ли миниатюра, и до её появления
+показывают исходную картинку, ограниченную по размеру. Для страницы
+карточек это спрашивается разом по всем картинкам (prefetch).
+
+Кроме JPEG-миниатюр для каждой картинки один раз готовятся варианты
+в современных форматах (WebP, AVIF — если Pillow умеет его сохранять)
+нескольких ширин из POST_IMAGE_WIDTHS. Шаблон отдаёт их через <picture>
+и srcset, и браузер сам выбирает подходящую ширину.
+"""
+import hashlib
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.engines.pil_engine import Engine as PilEngine
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from PIL import Image
+
+from .cache import bump, post_scopes
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = ('600x600', '500x500', '300x300')
+DEFAULT_WIDTHS = (320, 640, 960)
+DEFAULT_FORMATS = {
+    'avif': {'quality': 50},
+    'webp': {'quality': 80, 'method': 4},
+}
+VARIANTS_DIR = 'cache/variants'
+VARIANTS_KEY = 'posts:variants:{}'
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+# Сколько помнить, что вариантов ещё нет или их не удалось проверить.
+RETRY_TIMEOUT = 60
+
+_executor = None
+_pending = set()
+_lock = Lock()
+
+
+class Engine(PilEngine):
+    """Движок sorl для Pillow 10+, где убрана константа Image.ANTIALIAS."""
+
+    def _scale(self, image, width, height):
+        return image.resize((width, height), resample=Image.LANCZOS)
+
+
+class LookupBackend(ThumbnailBackend):
+    """Бэкенд sorl, умеющий найти миниатюру, не создавая её."""
+
+    def resolve_options(self, source, options):
+        # Повторяет подготовку опций из ThumbnailBackend.get_thumbnail,
+        # чтобы имя файла совпало с тем, что создаст генерация.
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        options = self.resolve_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def lookup(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options))
+
+    def lookup_many(self, files, geometry_string):
+        """Миниатюры нескольких файлов: {имя файла: миниатюра или None}.
+
+        Для хранилища sorl на базе с кэшем (по умолчанию) — один get_many
+        кэша и не больше одного запроса к базе вместо запроса на файл.
+        """
+        kvstore = default.kvstore
+        thumbnails = {
+            file_.name: self.thumbnail_file(file_, geometry_string)
+            for file_ in files
+        }
+        if not isinstance(kvstore, cached_db_kvstore.KVStore):
+            return {
+                name: kvstore.get(thumbnail)
+                for name, thumbnail in thumbnails.items()
+            }
+        keys = {
+            name: add_prefix(thumbnail.key)
+            for name, thumbnail in thumbnails.items()
+        }
+        values = kvstore.cache.get_many(keys.values())
+        missing = [key for key in keys.values() if key not in values]
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing).values_list('key', 'value'))
+            # Как и сам sorl, запоминаем и отсутствие записи: генерация
+            # миниатюры перезапишет ключ через kvstore.set.
+            fresh = {
+                key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in missing
+            }
+            kvstore.cache.set_many(
+                fresh, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(fresh)
+        return {
+            name: deserialize_image_file(values[key])
+            if values[key] != cached_db_kvstore.EMPTY_VALUE else None
+            for name, key in keys.items()
+        }
+
+
+lookup_backend = LookupBackend()
+
+
+def thumbnail_sizes():
+    return getattr(settings, 'POST_THUMBNAIL_SIZES', DEFAULT_SIZES)
+
+
+def variant_widths():
+    return getattr(settings, 'POST_IMAGE_WIDTHS', DEFAULT_WIDTHS)
+
+
+def variant_formats():
+    """Форматы вариантов, которые установленный Pillow умеет сохранять."""
+    Image.init()
+    formats = getattr(settings, 'POST_IMAGE_FORMATS', DEFAULT_FORMATS)
+    return {
+        fmt: options for fmt, options in formats.items()
+        if fmt.upper() in Image.SAVE
+    }
+
+
+def source_digest(name):
+    return hashlib.md5(name.encode()).hexdigest()
+
+
+def variant_name(name, width, fmt):
+    digest = source_digest(name)
+    return posixpath.join(VARIANTS_DIR, digest[:2], digest, f'{width}.{fmt}')
+
+
+def fit_widths(source_width):
+    """Ширины вариантов без увеличения: большие заменяются исходной."""
+    return sorted({min(width, source_width) for width in variant_widths()})
+
+
+def to_mode(image):
+    if image.mode in ('RGB', 'RGBA'):
+        return image
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def build_variants(name):
+    """Сохраняет недостающие варианты картинки и возвращает их список."""
+    formats = variant_formats()
+    if not formats:
+        return {}
+    with default_storage.open(name) as source_file:
+        source = to_mode(Image.open(source_file))
+        source.load()
+    variants = {}
+    for fmt, options in formats.items():
+        variants[fmt] = []
+        for width in fit_widths(source.width):
+            path = variant_name(name, width, fmt)
+            if not default_storage.exists(path):
+                height = max(1, round(source.height * width / source.width))
+                buffer = BytesIO()
+                source.resize((width, height), Image.LANCZOS).save(
+                    buffer, fmt.upper(), **options)
+                default_storage.save(path, ContentFile(buffer.getvalue()))
+            variants[fmt].append((width, default_storage.url(path)))
+    cache.set(VARIANTS_KEY.format(source_digest(name)), variants, None)
+    return variants
+
+
+def ready_variants(image):
+    """Готовые варианты {формат: [(ширина, url), ...]} или None.
+
+    Список берётся из кэша; если его вытеснили, наличие файлов
+    проверяется в хранилище по ширинам исходной картинки. Отсутствие
+    вариантов и ошибки проверки помнятся RETRY_TIMEOUT секунд.
+    """
+    if not image:
+        return None
+    if hasattr(image, '_ready_variants'):
+        return image._ready_variants
+    key = VARIANTS_KEY.format(source_digest(image.name))
+    variants = cache.get(key)
+    if variants is not None:
+        return variants or None
+    try:
+        widths = fit_widths(image.width)
+        variants = {}
+        for fmt in variant_formats():
+            paths = [variant_name(image.name, w, fmt) for w in widths]
+            if not all(map(default_storage.exists, paths)):
+                # add не затрёт список, который успела записать генерация.
+                cache.add(key, False, RETRY_TIMEOUT)
+                return None
+            variants[fmt] = [
+                (width, default_storage.url(path))
+                for width, path in zip(widths, paths)
+            ]
+    except Exception as error:
+        # Пропавший или битый файл: одна строка в лог на RETRY_TIMEOUT,
+        # а не трассировка на каждый показ.
+        if cache.add(key, False, RETRY_TIMEOUT):
+            logger.warning(
+                'Не удалось проверить варианты %s: %r', image, error)
+        return None
+    cache.set(key, variants, None)
+    return variants or None
+
+
+def ready_thumbnail(image, geometry):
+    """Готовая миниатюра или None, если она ещё не посчитана."""
+    if not image:
+        return None
+    prefetched = getattr(image, '_ready_thumbnails', {})
+    if geometry in prefetched:
+        return prefetched[geometry]
+    try:
+        return lookup_backend.lookup(image, geometry)
+    except Exception as error:
+        logger.warning('Не удалось проверить миниатюру %s: %r', image, error)
+        return None
+
+
+def prefetch(files, geometry):
+    """Разом узнаёт, что готово для картинок страницы.
+
+    Миниатюры ищутся через lookup_many, списки вариантов — одним
+    get_many кэша. Ответы запоминаются на самих файлах, и
+    ready_thumbnail/ready_variants для них больше никуда не ходят.
+    """
+    files = [file_ for file_ in files if file_]
+    if not files:
+        return
+    try:
+        thumbnails = lookup_backend.lookup_many(files, geometry)
+    except Exception as error:
+        logger.warning('Не удалось проверить миниатюры: %r', error)
+        thumbnails = dict.fromkeys(file_.name for file_ in files)
+    keys = {
+        file_.name: VARIANTS_KEY.format(source_digest(file_.name))
+        for file_ in files
+    }
+    cached = cache.get_many(keys.values())
+    has_variants = bool(variant_formats())
+    for file_ in files:
+        file_._ready_thumbnails = {
+            **getattr(file_, '_ready_thumbnails', {}),
+            geometry: thumbnails[file_.name],
+        }
+        if not has_variants:
+            continue
+        variants = cached.get(keys[file_.name])
+        if variants is None:
+            variants = ready_variants(file_)
+        file_._ready_variants = variants or None
+
+
+def is_ready(image, geometry):
+    """Готово ли всё, что шаблон покажет для картинки: миниатюра и варианты.
+
+    Пустая картинка считается готовой.
+    """
+    if not image:
+        return True
+    if ready_thumbnail(image, geometry) is None:
+        return False
+    return not variant_formats() or ready_variants(image) is not None
+
+
+def refresh_pages(name):
+    """Сбрасывает кэш страниц с постами, у которых картинка name.
+
+    Страницы, закэшированные до готовности миниатюр, показывают
+    оригинал; после генерации их нужно отрисовать заново.
+    """
+    scopes = set()
+    for post in Post.objects.filter(image=name).select_related(
+            'author', 'group'):
+        scopes.update(post_scopes(post))
+    bump(*scopes)
+
+
+def generate(name):
+    """Создаёт все размеры миниатюр и варианты для файла name."""
+    try:
+        for geometry in thumbnail_sizes():
+            default.backend.get_thumbnail(name, geometry)
+        build_variants(name)
+        refresh_pages(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def _run(name):
+    try:
+        generate(name)
+    finally:
+        # Поток пула держит собственные соединения с базой (kvstore sorl).
+        connections.close_all()
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def schedule(name):
+    """Ставит файл в очередь на генерацию миниатюр (без повторов)."""
+    if not name:
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    if getattr(settings, 'THUMBNAIL_WORKERS', 0) > 0:
+        executor().submit(_run, name)
+    else:
+        generate(name)
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from core.benchmark import measure
+
+TARGETS = (
+    ('полное декодирование', 'posts.management.commands.bench_upload:decode'),
+    ('PostForm', 'posts.management.commands.bench_upload:upload'),
+)
+
+
+def decode(path):
+    """Как раньше: оригинал декодируется целиком."""
+    with Image.open(path) as image:
+        image.load()
+
+
+def upload(path):
+    """Загрузка через PostForm с подготовкой картинки."""
+    from posts.forms import PostForm
+
+    result = TemporaryUploadedFile(
+        os.path.basename(path), 'image/jpeg', 0, None)
+    with open(path, 'rb') as source:
+        shutil.copyfileobj(source, result.file)
+    result.size = result.file.tell()
+    result.seek(0)
+    form = PostForm({'text': 'Замер'}, {'image': result})
+    if not form.is_valid():
+        raise ValueError(form.errors.as_text())
+    form.cleaned_data['image'].close()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет пиковую память при загрузке большой картинки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=8000)
+        parser.add_argument('--height', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        size = (options['width'], options['height'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.jpg')
+            exif = Image.Exif()
+            exif[0x0112] = 6
+            Image.new('RGB', size, 'green').save(path, 'JPEG', exif=exif)
+            self.stdout.write(
+                f'Картинка {size[0]}x{size[1]}, '
+                f'{os.path.getsize(path) // 1024} КБ'
+            )
+            for title, target in TARGETS:
+                result = measure(target, path)
+                self.stdout.write(
+                    f'{title}: пик {result["peak_kb"] // 1024} МБ, '
+                    f'+{result["delta_kb"] // 1024} МБ на загрузку, '
+                    f'{result["seconds"]:.2f} с'
+                )
@@ -0,0 +1,184 @@
+import itertools
+import json
+import math
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import max_rss_kb
+from core.query_budget import QueryCounter
+from posts import seeding
+from posts.models import Post, Profile
+
+PERCENTILES = (50, 95, 99)
+TARGETS = 10
+# Сравниваются с базовым замером: время и число запросов.
+COMPARED = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+
+
+def percentile(values, percent):
+    """Перцентиль по рангу в отсортированном списке."""
+    rank = max(math.ceil(len(values) * percent / 100), 1)
+    return values[rank - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер лент, публикации и комментариев через '
+            'тестовый клиент: p50/p95/p99, запросы к базе, память. '
+            'Пишет в базу — запускайте на отдельной (SQLITE_PATH).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--only', nargs='+', metavar='SCENARIO',
+            help='Замерить только эти сценарии.')
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Сначала наполнить базу (posts.seeding).')
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--save', metavar='FILE',
+                            help='Сохранить результат как базовый JSON.')
+        parser.add_argument('--compare', metavar='FILE',
+                            help='Сравнить с базовым JSON.')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='Регрессия — рост больше чем на N %%.')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            created = seeding.seed(
+                users=options['users'], posts=options['posts'],
+                comments=options['posts'])
+            self.stdout.write(f'Создано: {created}')
+        if not Post.objects.exists():
+            raise CommandError('В базе нет постов: запустите с --seed.')
+        scenarios = self.scenarios()
+        names = options['only'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f'Нет сценариев: {", ".join(unknown)}')
+        results = {
+            name: self.run(scenarios[name], options) for name in names
+        }
+        report = {
+            'commit': git_commit(),
+            'requests': options['requests'],
+            'posts': Post.objects.count(),
+            'results': results,
+        }
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+        regressions = self.write_report(report, baseline, options)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(
+                f'Регрессии: {", ".join(regressions)}')
+
+    def scenarios(self):
+        """Сценарий — функция client -> response, цикл по целям."""
+        profiles = Profile.objects.select_related('user')
+        reader = profiles.order_by('-following_count').first().user
+        authors = itertools.cycle([
+            profile.user.username
+            for profile in profiles.order_by('-followers_count')[:TARGETS]
+        ])
+        posts = itertools.cycle(
+            Post.objects.order_by('-comments_count').values_list(
+                'pk', flat=True)[:TARGETS])
+        self.client = Client(SERVER_NAME='localhost', REMOTE_ADDR='192.0.2.1')
+        self.client.force_login(reader)
+        return {
+            'index': lambda: self.client.get(reverse('post:index')),
+            'follow_index': lambda: self.client.get(
+                reverse('post:follow_index')),
+            'profile': lambda: self.client.get(
+                reverse('post:profile', args=[next(authors)])),
+            'post_detail': lambda: self.client.get(
+                reverse('post:post_detail', args=[next(posts)])),
+            'post_create': lambda: self.client.post(
+                reverse('post:post_create'), {'text': 'Пост для замера'}),
+            'add_comment': lambda: self.client.post(
+                reverse('post:add_comment', args=[next(posts)]),
+                {'text': 'Комментарий для замера'}),
+        }
+
+    def run(self, request, options):
+        for _ in range(options['warmup']):
+            request()
+        timings, queries = [], []
+        rss_before = max_rss_kb()
+        for _ in range(options['requests']):
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with counter.capture():
+                response = request()
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(counter))
+            if response.status_code >= 400:
+                path = response.request['PATH_INFO']
+                raise CommandError(f'{response.status_code} от {path}')
+        timings.sort()
+        return {
+            **{f'p{percent}_ms': round(percentile(timings, percent), 2)
+               for percent in PERCENTILES},
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'peak_rss_kb': max_rss_kb(),
+            'rss_growth_kb': max_rss_kb() - rss_before,
+        }
+
+    def write_report(self, report, baseline, options):
+        regressions = []
+        previous = (baseline or {}).get('results', {})
+        if baseline:
+            self.stdout.write(
+                f'Сравнение с {baseline.get("commit") or "базой"} '
+                f'(порог {options["threshold"]:g} %)')
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f'{name:13} p50 {result["p50_ms"]:7.2f}  '
+                f'p95 {result["p95_ms"]:7.2f}  '
+                f'p99 {result["p99_ms"]:7.2f} мс  '
+                f'SQL {result["queries_mean"]:5.1f} '
+                f'(max {result["queries_max"]})  '
+                f'RSS +{result["rss_growth_kb"]} КБ'
+            )
+            before = previous.get(name)
+            if not before:
+                continue
+            for metric in COMPARED:
+                old, new = before[metric], result[metric]
+                if not old:
+                    continue
+                change = (new - old) / old * 100
+                if change > options['threshold']:
+                    regressions.append(f'{name}.{metric}')
+                    style = self.style.ERROR
+                elif change < -options['threshold']:
+                    style = self.style.SUCCESS
+                else:
+                    continue
+                self.stdout.write(style(
+                    f'  {metric}: {old} → {new} ({change:+.0f} %)'))
+        return regressions
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import images
+from posts.models import Post
+
+
+def build(name):
+    try:
+        images.generate(name)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для всех картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=max(settings.THUMBNAIL_WORKERS, 1),
+            help='Число потоков, параллельно считающих миниатюры.',
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        total = 0
+        if options['workers'] <= 1:
+            for name in names.iterator():
+                images.generate(name)
+                total += 1
+        else:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                for _ in pool.map(build, names.iterator()):
+                    total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы для {total} картинок.'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Применяет затухание к рейтингам популярного с прошлого запуска '
+            '(запускайте по расписанию, например раз в 10 минут).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать рейтинги заново по постам и комментариям.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинги пересчитаны, постов: {total}.'))
+            return
+        factor, deleted = trending.decay()
+        self.stdout.write(self.style.SUCCESS(
+            f'Множитель {factor:.4f}, удалено угасших: {deleted}.'))
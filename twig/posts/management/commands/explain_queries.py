@@ -0,0 +1,89 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.feed import ENTRY_ORDERING, follow_feed
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+
+FEED_ORDERING = ('-pub_date', '-pk')
+PAGE = 10
+# Признаки плохого плана SQLite: полный проход по таблице и сортировка
+# во временном B-дереве вместо чтения по индексу.
+WARNINGS = ('SCAN ', 'USE TEMP B-TREE')
+
+
+def access_paths():
+    """Запросы представлений с подставленными id из базы."""
+    user = User.objects.order_by('pk').values_list('pk', flat=True).first()
+    group = Group.objects.order_by('pk').values_list('pk', flat=True).first()
+    post = Post.objects.order_by('pk').values_list('pk', flat=True).first()
+    user, group, post = user or 1, group or 1, post or 1
+    return {
+        'index': Post.objects.with_related().order_by(
+            *FEED_ORDERING)[:PAGE],
+        'group_posts': Post.objects.with_related().filter(
+            group_id=group).order_by(*FEED_ORDERING)[:PAGE],
+        'profile': Post.objects.with_related().filter(
+            author_id=user).order_by(*FEED_ORDERING)[:PAGE],
+        'profile.following': Follow.objects.filter(
+            author_id=user, user_id=user)[:1],
+        'profile_follow': Follow.objects.filter(
+            user_id=user, author_id=user),
+        'follow_index': FeedEntry.objects.filter(user_id=user).select_related(
+            'post__author', 'post__group').order_by(
+            *ENTRY_ORDERING)[:PAGE + 1],
+        'follow_index.page': follow_feed(user).with_related().order_by(
+            *FEED_ORDERING)[:PAGE],
+        'fan_out': Follow.objects.filter(
+            author_id=user).values_list('user_id', flat=True),
+        'post_detail.comments': Comment.objects.filter(
+            post_id=post, active=True).select_related('author').order_by(
+            'created', 'pk')[:PAGE + 1],
+        'api:comment_list': Comment.objects.filter(
+            post_id=post, active=True).select_related('author').order_by(
+            'created', 'pk')[:PAGE + 1],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Печатает EXPLAIN QUERY PLAN запросов лент, подписок и '
+            'комментариев и отмечает полные проходы и сортировки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--save', metavar='FILE', help='Сохранить планы в JSON.')
+        parser.add_argument(
+            '--compare', metavar='FILE',
+            help='Показать рядом планы, сохранённые раньше (--save).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Планы разбираются только для SQLite.')
+        plans = {
+            label: queryset.explain().splitlines()
+            for label, queryset in access_paths().items()
+        }
+        before = {}
+        if options['compare']:
+            with open(options['compare']) as file:
+                before = json.load(file)
+        for label, plan in plans.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            if label in before and before[label] != plan:
+                self.write_plan(before[label], 'было')
+                self.write_plan(plan, 'стало')
+            else:
+                self.write_plan(plan)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(plans, file, ensure_ascii=False, indent=2)
+
+    def write_plan(self, plan, title=None):
+        if title:
+            self.stdout.write(f'  {title}:')
+        for line in plan:
+            style = self.style.WARNING if any(
+                warning in line for warning in WARNINGS
+            ) else str
+            self.stdout.write(style(f'    {line}'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в NDJSON (файл *.gz сжимается) с постоянной '
+            'памятью. Прерванная выгрузка продолжается с контрольной '
+            'точки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--chunk-size', type=int, default=transfer.CHUNK_SIZE)
+        parser.add_argument(
+            '--media-manifest', metavar='FILE',
+            help='Записать список картинок с размерами и sha256.')
+
+    def handle(self, *args, **options):
+        counts = transfer.export(options['path'], options['chunk_size'])
+        for name, total in counts.items():
+            self.stdout.write(f'{name}: {total}')
+        if options['media_manifest']:
+            total = transfer.export_media_manifest(options['media_manifest'])
+            self.stdout.write(f'Картинок в манифесте: {total}')
+        self.stdout.write(self.style.SUCCESS('Выгрузка готова.'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_graph пакетами bulk_create. '
+            'Прерванная загрузка продолжается с контрольной точки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--chunk-size', type=int, default=transfer.CHUNK_SIZE)
+        parser.add_argument(
+            '--index-search', action='store_true',
+            help='Перестроить поисковый индекс после загрузки.')
+        parser.add_argument(
+            '--media-manifest', metavar='FILE',
+            help='Проверить, что картинки из манифеста лежат в MEDIA_ROOT.')
+
+    def handle(self, *args, **options):
+        try:
+            counts = transfer.load(
+                options['path'], options['chunk_size'],
+                index_search=options['index_search'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for name, total in counts.items():
+            self.stdout.write(f'{name}: {total}')
+        if options['media_manifest']:
+            problems = transfer.check_media_manifest(
+                options['media_manifest'])
+            for path in problems:
+                self.stderr.write(f'Нет или отличается: {path}')
+            if problems:
+                raise CommandError(
+                    f'Картинок с проблемами: {len(problems)}')
+        self.stdout.write(self.style.SUCCESS('Загрузка готова.'))
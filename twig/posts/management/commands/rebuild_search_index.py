@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = search.rebuild()
+        backend = 'FTS5' if search.has_fts() else 'SearchTerm'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {total} ({backend}).'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = ('Дополняет сводки статистики групп постами и комментариями, '
+            'появившимися с прошлого запуска (запускайте по расписанию).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Посчитать сводки заново по всем данным.')
+
+    def handle(self, *args, **options):
+        counts = stats.rebuild() if options['rebuild'] else stats.update()
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтено постов: {counts["posts"]}, '
+            f'комментариев: {counts["comments"]}.'))
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, группами, '
+            'постами, комментариями и степенным графом подписок. '
+            'При одном --seed данные одинаковы при любом --workers. '
+            'Пишет в базу — запускайте на отдельной (SQLITE_PATH).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument(
+            '--comments', type=int,
+            help='Число комментариев, по умолчанию — как постов.')
+        parser.add_argument(
+            '--following', type=int, default=20,
+            help='Среднее число подписок пользователя.')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней раскидать посты.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Процессов, генерирующих строки.')
+        parser.add_argument(
+            '--images', type=float, default=0, metavar='SHARE',
+            help='Доля постов со сгенерированной картинкой, от 0 до 1.')
+        parser.add_argument(
+            '--index-search', action='store_true',
+            help='Построить поисковый индекс после вставки.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['images'] <= 1:
+            raise CommandError('--images — доля от 0 до 1.')
+        if options['users'] < 2 and options['posts']:
+            raise CommandError('Для постов нужно хотя бы два пользователя.')
+        comments = options['comments']
+        started = time.perf_counter()
+        created = seeding.seed(
+            users=options['users'], posts=options['posts'],
+            groups=options['groups'],
+            comments=options['posts'] if comments is None else comments,
+            following=options['following'], days=options['days'],
+            seed=options['seed'], index_search=options['index_search'],
+            workers=options['workers'], images=options['images'],
+        )
+        for name, total in created.items():
+            self.stdout.write(f'{name}: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с.'))
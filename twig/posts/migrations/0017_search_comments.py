@@ -0,0 +1,108 @@
+# Generated by Django 2.2.16 on 2026-10-17 08:32
+
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TABLE = 'posts_search'
+FTS_COMMENTS_TABLE = 'posts_search_comments'
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+
+def has_fts(schema_editor):
+    connection = schema_editor.connection
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+def split_comments(apps, schema_editor):
+    """Даёт каждому комментарию свои строки в поисковом индексе.
+
+    Прежние строки смешивали текст поста с его комментариями, поэтому
+    индекс (таблицы FTS5 или SearchTerm) заполняется заново.
+    """
+    from posts.search import COMMENTS_WEIGHT, TEXT_WEIGHT, terms
+
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    rows = [
+        (post_id, None, text, TEXT_WEIGHT)
+        for post_id, text in Post.objects.values_list('pk', 'text')
+    ] + [
+        (post_id, comment_id, text, COMMENTS_WEIGHT)
+        for comment_id, post_id, text in Comment.objects.filter(
+            active=True).values_list('pk', 'post_id', 'text')
+    ]
+    SearchTerm.objects.all().delete()
+    if not has_fts(schema_editor):
+        SearchTerm.objects.bulk_create(
+            SearchTerm(
+                post_id=post_id, comment_id=comment_id, term=term,
+                weight=count * weight,
+            )
+            for post_id, comment_id, text, weight in rows
+            for term, count in Counter(terms(text)).items()
+        )
+        return
+    schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, {TOKENIZE})')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_COMMENTS_TABLE} USING fts5('
+        f'post UNINDEXED, text, {TOKENIZE})'
+    )
+    with schema_editor.connection.cursor() as cursor:
+        for post_id, comment_id, text, weight in rows:
+            if comment_id is None:
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                    [post_id, ' '.join(terms(text))],
+                )
+            else:
+                cursor.execute(
+                    f'INSERT INTO {FTS_COMMENTS_TABLE} (rowid, post, text) '
+                    'VALUES (%s, %s, %s)',
+                    [comment_id, post_id, ' '.join(terms(text))],
+                )
+
+
+def merge_comments(apps, schema_editor):
+    """Возвращает прежние таблицы FTS5 пустыми: после отката индекс
+    заполняет rebuild_search_index."""
+    apps.get_model('posts', 'SearchTerm').objects.all().delete()
+    if not has_fts(schema_editor):
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_COMMENTS_TABLE}')
+    schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+        f'text, comments, {TOKENIZE})'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_comment_active_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchterm',
+            name='comment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Comment'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchterm',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ),
+        migrations.RunPython(split_comments, merge_comments),
+    ]
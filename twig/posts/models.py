@@ -14,6 +14,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def with_related(self):
+        """Подтягивает автора и группу одним запросом вместе с постами."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     """Модель для постов."""
     text = models.TextField(
@@ -45,12 +51,33 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            # Лента автора и лента группы: фильтр и сортировка по индексу.
+            # Индекс по возрастанию с неявным rowid в конце SQLite читает
+            # задом наперёд и получает ORDER BY pub_date DESC, id DESC
+            # без сортировки во временном B-дереве.
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx',
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -77,6 +104,17 @@ class Comment(models.Model):
         default=True
     )
 
+    class Meta:
+        indexes = [
+            # Комментарии поста читаются только активные и по времени:
+            # WHERE post_id = ? AND active ORDER BY created, id идёт
+            # по индексу без сортировки (id — неявный rowid в конце).
+            models.Index(
+                fields=['post', 'active', 'created'],
+                name='comment_active_created_idx',
+            ),
+        ]
+
 
 class Follow(models.Model):
     """Система подписки"""
@@ -90,3 +128,158 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE,
     )
+
+    class Meta:
+        unique_together = ('user', 'author')
+
+
+class Profile(models.Model):
+    """Счётчики пользователя, которые иначе считались бы COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    def __str__(self):
+        return str(self.user)
+
+
+class FeedEntry(models.Model):
+    """Запись во входящей ленте подписчика (fan-out при публикации)."""
+    user = models.ForeignKey(
+        User,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_user_author_idx',
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Основа слова поста в поисковом индексе (если в базе нет FTS5).
+
+    comment пуст у основ текста поста; у основ комментария — он сам.
+    """
+    post = models.ForeignKey(
+        Post,
+        related_name='search_terms',
+        on_delete=models.CASCADE,
+    )
+    comment = models.ForeignKey(
+        Comment,
+        related_name='search_terms',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['term', 'post'],
+                name='search_term_post_idx',
+            ),
+        ]
+
+
+class PostScore(models.Model):
+    """Рейтинг поста для страницы популярного (posts.trending)."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+    )
+    score = models.FloatField('Рейтинг', default=0)
+
+    class Meta:
+        indexes = [
+            # ORDER BY score DESC, post_id DESC — обратный проход индекса:
+            # post_id здесь и есть rowid.
+            models.Index(fields=['score'], name='post_score_idx'),
+        ]
+
+
+class Watermark(models.Model):
+    """Докуда периодическая задача уже обработала данные.
+
+    value — момент (затухание популярного), last_id — наибольший
+    обработанный первичный ключ (сводки по группам).
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    value = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+class GroupDailyStats(models.Model):
+    """Сводка группы за день: постов и комментариев к её постам."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+    )
+    day = models.DateField()
+    posts = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('group', 'day')
+
+
+class GroupAuthorStats(models.Model):
+    """Число постов автора в группе — для списка самых активных."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    posts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('group', 'author')
+        indexes = [
+            models.Index(
+                fields=['group', 'posts'],
+                name='group_author_posts_idx',
+            ),
+        ]
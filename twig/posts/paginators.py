@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу сортировки (keyset) без COUNT(*).
+
+    Страница выбирается условием «после/до ключа последней показанной
+    записи», поэтому стоимость любой страницы равна стоимости первой.
+    Номер страницы передаётся внутри курсора только для отображения.
+    Запросы со старым параметром ?page=N обслуживаются через OFFSET,
+    тоже без COUNT(*): номер за последней страницей даёт первую.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk')):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self._num_pages = None
+
+    @property
+    def num_pages(self):
+        if self._num_pages is None:
+            self._num_pages = super().num_pages
+        return self._num_pages
+
+    def get_page(self, number=None, cursor=None):
+        if cursor:
+            try:
+                return self.cursor_page(cursor)
+            except ValueError:
+                pass
+        page = self.offset_page(number) if number else None
+        if page is None:
+            page = self.keyset_page(None, 1)
+        self.add_cursors(page)
+        return page
+
+    def cursor_page(self, cursor):
+        backward, number, values = self.decode(cursor)
+        if not backward:
+            page = self.keyset_page(values, number)
+        else:
+            rows = self.fetch(values, True, self.per_page + 1)
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            number = max(number, 2) if more else 1
+            self._num_pages = number + 1
+            page = self._get_page(rows, number, self)
+        self.add_cursors(page)
+        return page
+
+    def offset_page(self, number):
+        """Страница ?page=N через OFFSET; None, если номер неверен или
+        страница пуста."""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return None
+        if number < 2:
+            return None
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows:
+            return None
+        self._num_pages = number + 1 if len(rows) > self.per_page else number
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def fetch(self, values, backward, limit):
+        """До limit записей строго после ключа values (None — с начала).
+
+        backward — в обратном порядке. Подклассы переопределяют метод,
+        чтобы собирать страницу из нескольких источников.
+        """
+        return self.fetch_from(
+            self.object_list, self.ordering, values, backward, limit)
+
+    def fetch_from(self, queryset, ordering, values, backward, limit):
+        """fetch для queryset с полями ключа ordering (того же смысла)."""
+        if values is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(values, backward, ordering))
+        if backward:
+            ordering = [self.reverse_field(field) for field in ordering]
+        return list(queryset.order_by(*ordering)[:limit])
+
+    def keyset_page(self, values, number):
+        rows = self.fetch(values, False, self.per_page + 1)
+        more = len(rows) > self.per_page
+        self._num_pages = number + 1 if more else number
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def add_cursors(self, page):
+        page.next_cursor = page.previous_cursor = None
+        rows = list(page)
+        if not rows:
+            return
+        if page.has_next():
+            page.next_cursor = self.encode(rows[-1], False, page.number + 1)
+        if page.has_previous():
+            page.previous_cursor = self.encode(
+                rows[0], True, page.number - 1
+            )
+
+    def keyset_filter(self, values, backward, ordering=None):
+        """Лексикографическое условие «строго после ключа»."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering or self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != backward
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    @staticmethod
+    def reverse_field(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def model_field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def encode(self, obj, backward, number):
+        values = [
+            self.model_field(field.lstrip('-')).value_to_string(obj)
+            for field in self.ordering
+        ]
+        data = json.dumps([int(backward), number, *values])
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            backward, number, *values = json.loads(raw.decode())
+            number = int(number)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise ValueError('Некорректный курсор')
+        if len(values) != len(self.ordering) or number < 1:
+            raise ValueError('Некорректный курсор')
+        try:
+            values = [
+                self.model_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise ValueError('Некорректный курсор')
+        return bool(backward), number, values
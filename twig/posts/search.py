@@ -0,0 +1,254 @@
+"""Полнотекстовый поиск по постам и их комментариям.
+
+Текст разбивается на слова, приводится к нижнему регистру (ё → е)
+и к основам русским стеммером, поэтому «кошками» находит «кошка».
+Основы хранятся в обратном индексе: в таблицах FTS5 posts_search и
+posts_search_comments, если SQLite собран с этим модулем, иначе — в модели
+SearchTerm. Обе реализации ищут каждую основу запроса как префикс основ
+текста. У поста и у каждого комментария свои строки индекса: сигналы
+обновляют только строки изменённого поста или комментария, не перечитывая
+остальные комментарии, а пост подходит, если каждая основа запроса нашлась
+в его тексте или в комментариях. rebuild_search_index перестраивает
+индекс целиком.
+
+Поиск возвращает не больше SEARCH_MAX_RESULTS (500) самых подходящих
+постов — и на странице поиска, и в поиске админки.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+
+from .models import Comment, Post, SearchTerm
+from .stemmer import stem
+
+FTS_TABLE = 'posts_search'
+FTS_COMMENTS_TABLE = 'posts_search_comments'
+WORD_RE = re.compile(r'[^\W_]+')
+MAX_TERM_LENGTH = 64
+# Больше любого символа основы: верхняя граница диапазона префикса.
+PREFIX_END = '\U0010ffff'
+# Вес совпадения в тексте поста и в комментариях к нему.
+TEXT_WEIGHT = 2.0
+COMMENTS_WEIGHT = 1.0
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'да', 'для', 'до', 'же', 'за', 'и', 'из',
+    'или', 'к', 'ко', 'ли', 'на', 'над', 'не', 'ни', 'но', 'о', 'об', 'от',
+    'по', 'под', 'при', 'с', 'со', 'то', 'у', 'что', 'это',
+))
+
+_fts_tables = {}
+
+
+def max_results():
+    return getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+
+
+def terms(text):
+    """Основы слов текста в порядке появления."""
+    words = WORD_RE.findall(text.lower().replace('ё', 'е'))
+    return [
+        stem(word)[:MAX_TERM_LENGTH] for word in words
+        if word not in STOP_WORDS
+    ]
+
+
+class FTSIndex:
+    """Индекс во встроенных таблицах SQLite FTS5, ранжирование по bm25.
+
+    Строка поста в FTS_TABLE — с rowid поста, строка комментария в
+    FTS_COMMENTS_TABLE — с rowid комментария и id поста в колонке post.
+    """
+
+    def update(self, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post_id, ' '.join(terms(text))],
+            )
+
+    def add_comment(self, comment_id, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_COMMENTS_TABLE} (rowid, post, text) '
+                'VALUES (%s, %s, %s)',
+                [comment_id, post_id, ' '.join(terms(text))],
+            )
+
+    def remove_comment(self, comment_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_COMMENTS_TABLE} WHERE rowid = %s',
+                [comment_id])
+
+    def remove(self, post_id):
+        # Колонка post не индексирована: строки комментариев находятся
+        # по их id, поэтому пост убирают из индекса до удаления
+        # комментариев.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+            cursor.execute(
+                f'DELETE FROM {FTS_COMMENTS_TABLE} WHERE rowid IN '
+                f'(SELECT id FROM {Comment._meta.db_table} '
+                f'WHERE post_id = %s)',
+                [post_id],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'DELETE FROM {FTS_COMMENTS_TABLE}')
+
+    def search(self, query_terms, limit):
+        # Каждая основа ищется как префикс: стеммер оставляет основы
+        # короче словоформ, и «программ» найдёт «программирование».
+        # Совпадения с текстом и с комментариями собираются по постам,
+        # пост подходит, если нашлась каждая основа.
+        parts, params = [], []
+        unique = sorted(set(query_terms))
+        for number, term in enumerate(unique):
+            match = f'"{term}"*'
+            parts.append(
+                f'SELECT rowid AS post_id, {number} AS term, '
+                f'bm25({FTS_TABLE}) * %s AS rank '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+            )
+            parts.append(
+                f'SELECT post AS post_id, {number} AS term, '
+                f'bm25({FTS_COMMENTS_TABLE}) * %s AS rank '
+                f'FROM {FTS_COMMENTS_TABLE} '
+                f'WHERE {FTS_COMMENTS_TABLE} MATCH %s'
+            )
+            params += [TEXT_WEIGHT, match, COMMENTS_WEIGHT, match]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM ({" UNION ALL ".join(parts)}) '
+                'GROUP BY post_id HAVING COUNT(DISTINCT term) = %s '
+                'ORDER BY SUM(rank), post_id DESC LIMIT %s',
+                params + [len(unique), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class TermIndex:
+    """Индекс в обычной таблице SearchTerm для баз без FTS5.
+
+    Строки поста — с пустым comment, у каждого комментария свои.
+    """
+
+    def update(self, post_id, text):
+        SearchTerm.objects.filter(
+            post_id=post_id, comment__isnull=True).delete()
+        self.create(post_id, None, text, TEXT_WEIGHT)
+
+    def add_comment(self, comment_id, post_id, text):
+        self.create(post_id, comment_id, text, COMMENTS_WEIGHT)
+
+    def remove_comment(self, comment_id):
+        SearchTerm.objects.filter(comment_id=comment_id).delete()
+
+    def create(self, post_id, comment_id, text, weight):
+        weights = Counter(terms(text))
+        SearchTerm.objects.bulk_create(
+            SearchTerm(
+                post_id=post_id, comment_id=comment_id, term=term,
+                weight=count * weight,
+            )
+            for term, count in weights.items()
+        )
+
+    def remove(self, post_id):
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+
+    def search(self, query_terms, limit):
+        # Префикс — диапазон по индексу (term, post), как у FTSIndex;
+        # пост подходит, если каждая основа запроса нашла у него слово
+        # в тексте или в комментариях.
+        condition, matched = Q(), {}
+        for number, term in enumerate(sorted(set(query_terms))):
+            prefix = Q(term__gte=term, term__lt=term + PREFIX_END)
+            condition |= prefix
+            matched[f'matched_{number}'] = Max(Case(
+                When(prefix, then=1), default=0,
+                output_field=IntegerField(),
+            ))
+        return list(
+            SearchTerm.objects.filter(condition).values(
+                'post_id'
+            ).annotate(
+                score=Sum('weight'), **matched,
+            ).filter(
+                **{name: 1 for name in matched}
+            ).order_by('-score', '-post_id').values_list(
+                'post_id', flat=True
+            )[:limit]
+        )
+
+
+def has_fts():
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[name]
+
+
+def get_index():
+    return FTSIndex() if has_fts() else TermIndex()
+
+
+def index_post(post):
+    """Переиндексирует текст поста; строки комментариев не трогает."""
+    get_index().update(post.pk, post.text)
+
+
+def index_comment(comment):
+    """Обновляет строки комментария: активный индексируется заново,
+    скрытый убирается из индекса."""
+    index = get_index()
+    index.remove_comment(comment.pk)
+    if comment.active:
+        index.add_comment(comment.pk, comment.post_id, comment.text)
+
+
+def remove_comment(comment):
+    get_index().remove_comment(comment.pk)
+
+
+def remove_post(post_id):
+    """Убирает пост и его комментарии из индекса; вызывается до удаления
+    комментариев."""
+    get_index().remove(post_id)
+
+
+def rebuild():
+    """Строит индекс заново; возвращает число проиндексированных постов."""
+    index = get_index()
+    index.clear()
+    total = 0
+    for post_id, text in Post.objects.values_list('pk', 'text').iterator():
+        index.update(post_id, text)
+        total += 1
+    for comment_id, post_id, text in Comment.objects.filter(
+        active=True
+    ).values_list('pk', 'post_id', 'text').iterator():
+        index.add_comment(comment_id, post_id, text)
+    return total
+
+
+def search(query, limit=None):
+    """id постов по запросу, от самых подходящих к менее подходящим."""
+    query_terms = terms(query)
+    if not query_terms:
+        return []
+    return get_index().search(query_terms, limit or max_results())
@@ -0,0 +1,392 @@
+"""Наполнение базы правдоподобными данными для замеров.
+
+seed() детерминированно (при одном и том же seed) создаёт пользователей,
+группы, посты, комментарии и подписки через bulk_create. Граф подписок
+степенной: на немногих авторов подписаны тысячи, на большинство —
+единицы, а сами пользователи подписываются кто на пару авторов, кто
+на сотни. После вставки пересчитываются счётчики (counters.reconcile)
+и раскладываются входящие ленты (feed.fill_inboxes), как это сделали
+бы сигналы.
+
+Строки генерируются частями по CHUNK_SIZE, у каждой части свои
+генераторы случайных чисел (chunk_random). Части можно раздать
+процессам-работникам (workers), а вставляет их по порядку один
+процесс — данные при этом те же, что и без работников.
+
+У всех созданных пользователей пароль SEED_PASSWORD.
+"""
+import bisect
+import functools
+import io
+import itertools
+import math
+import multiprocessing
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from . import counters, feed, search, stats, trending
+from .models import Comment, FeedEntry, Follow, Group, Post, User
+
+SEED_PASSWORD = 'seed-password'
+BATCH_SIZE = 1000
+# Строк в одной части генерации: у каждой части свой генератор
+# случайных чисел, поэтому данные не зависят от числа процессов.
+CHUNK_SIZE = 10000
+FOLLOW_CHUNK_SIZE = 1000
+IMAGE_SIZE = (640, 480)
+# Показатель степенного закона: чем больше, тем сильнее популярность
+# сосредоточена у первых авторов.
+POPULARITY_EXPONENT = 1.1
+FOLLOWING_EXPONENT = 1.5
+MAX_FOLLOWING = 500
+
+
+@contextmanager
+def manual_dates(*models):
+    """Даёт задать даты самим, минуя auto_now и auto_now_add."""
+    saved = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def insert(model, objects, **options):
+    """bulk_create по частям: bulk_create сначала строит список целиком.
+
+    Размер пакета INSERT Django выбирает сам: SQLite ограничивает число
+    параметров запроса.
+    """
+    objects = iter(objects)
+    while True:
+        chunk = list(itertools.islice(objects, BATCH_SIZE))
+        if not chunk:
+            return
+        model.objects.bulk_create(chunk, **options)
+
+
+def moment(timestamp):
+    """datetime для timestamp с учётом USE_TZ."""
+    value = datetime.fromtimestamp(timestamp, timezone.utc)
+    return value if settings.USE_TZ else timezone.make_naive(value)
+
+
+def power_law_weights(count, exponent):
+    """Накопленные веса Ципфа для choices(cum_weights=...)."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+_weights = {}
+
+
+def cached_weights(count):
+    """Веса на count рангов; в процессе-работнике считаются один раз."""
+    if count not in _weights:
+        _weights.clear()
+        _weights[count] = power_law_weights(count, POPULARITY_EXPONENT)
+    return _weights[count]
+
+
+def rank(rng, cum_weights):
+    """Номер (с нуля) по весам Ципфа: малые номера выпадают чаще."""
+    return bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+def scatter(number, count):
+    """Перестановка 0..count-1 без списка: популярные посты — не подряд."""
+    step = int(count * 0.618) | 1
+    while math.gcd(step, count) != 1:
+        step += 2
+    return number * step % count
+
+
+_faker = None
+
+
+def chunk_random(seed, kind, number):
+    """Генераторы для части number: не зависят от порядка и процесса."""
+    global _faker
+    if _faker is None:
+        _faker = Faker('ru_RU')
+    key = f'{seed}:{kind}:{number}'
+    _faker.seed_instance(key)
+    return random.Random(key), _faker
+
+
+def chunks(total, size=CHUNK_SIZE):
+    """(номер, первая строка, число строк) для частей по size строк."""
+    return [
+        (number, start, min(size, total - start))
+        for number, start in enumerate(range(0, total, size))
+    ]
+
+
+def user_rows(task):
+    seed, number, start, count, first_pk = task
+    _, fake = chunk_random(seed, 'users', number)
+    return [
+        (f'{fake.user_name()}_{first_pk + start + row}',
+         fake.first_name(), fake.last_name())
+        for row in range(count)
+    ]
+
+
+def draw_image(rng, name):
+    """Картинка из случайных фигур; уже нарисованная не перерисовывается."""
+    if default_storage.exists(name):
+        return name
+    image = Image.new('RGB', IMAGE_SIZE, tuple(
+        rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    width, height = IMAGE_SIZE
+    for _ in range(rng.randint(3, 12)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        box = (x, y, x + rng.randint(20, width // 2),
+               y + rng.randint(20, height // 2))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse(box, fill=color)
+        else:
+            draw.rectangle(box, fill=color)
+    content = io.BytesIO()
+    image.save(content, 'JPEG', quality=80)
+    return default_storage.save(name, ContentFile(content.getvalue()))
+
+
+def post_rows(task):
+    """Посты части: даты — свой отрезок общей шкалы, по возрастанию.
+
+    Авторов выбирает степенной закон: пишут в основном первые, самые
+    популярные пользователи.
+    """
+    (seed, number, start, count, total, users, groups, end, span,
+     images) = task
+    rng, fake = chunk_random(seed, 'posts', number)
+    weights = cached_weights(users)
+    begin = end - span + span * start / total
+    width = span * count / total
+    dates = sorted(begin + rng.random() * width for _ in range(count))
+    rows = []
+    for row, timestamp in enumerate(dates):
+        image = ''
+        if rng.random() < images:
+            image = draw_image(rng, f'posts/seed-{seed}-{start + row}.jpg')
+        rows.append((
+            rank(rng, weights),
+            rng.randrange(groups) if groups and rng.random() < 0.7 else None,
+            fake.paragraph(nb_sentences=rng.randint(1, 8)),
+            timestamp,
+            image,
+        ))
+    return rows
+
+
+def comment_rows(task):
+    """Комментарии тоже степенные: обсуждают немногие посты."""
+    seed, number, count, posts, users = task
+    rng, fake = chunk_random(seed, 'comments', number)
+    weights = cached_weights(posts)
+    return [
+        (scatter(rank(rng, weights), posts), rng.randrange(users),
+         fake.sentence(), rng.randint(1, 600))
+        for _ in range(count)
+    ]
+
+
+def follow_rows(task):
+    """Подписки: число подписок и популярность авторов — степенные.
+
+    Самые читаемые авторы — не те, кто больше всех пишет: иначе почти
+    все посты разошлись бы по тысячам лент.
+    """
+    seed, number, start, count, users, following = task
+    rng, _ = chunk_random(seed, 'follows', number)
+    weights = cached_weights(users)
+    limit = min(MAX_FOLLOWING, users - 1)
+    rows = []
+    for user in range(start, start + count):
+        wanted = min(limit, int(following * (rng.paretovariate(
+            FOLLOWING_EXPONENT) - 1) * (FOLLOWING_EXPONENT - 1)) + 1)
+        chosen = set()
+        while len(chosen) < wanted:
+            author = scatter(rank(rng, weights), users)
+            if author != user:
+                chosen.add(author)
+        rows.extend((user, author) for author in sorted(chosen))
+    return rows
+
+
+def next_pk(model):
+    return (model.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0) + 1
+
+
+def new_pks(model, start):
+    return array('q', model.objects.filter(pk__gte=start).order_by(
+        'pk').values_list('pk', flat=True).iterator())
+
+
+def create_users(run, seed, count):
+    password = make_password(SEED_PASSWORD)
+    first_pk = next_pk(User)
+    tasks = [
+        (seed, number, start, size, first_pk)
+        for number, start, size in chunks(count)
+    ]
+    insert(User, (
+        User(username=username, first_name=first_name,
+             last_name=last_name, password=password)
+        for rows in run(user_rows, tasks)
+        for username, first_name, last_name in rows
+    ))
+    return new_pks(User, first_pk)
+
+
+def create_groups(seed, count):
+    _, fake = chunk_random(seed, 'groups', 0)
+    start = next_pk(Group)
+    insert(Group, (
+        Group(
+            title=fake.sentence(nb_words=2).rstrip('.'),
+            slug=f'group-{start + number}',
+            description=fake.paragraph(),
+        )
+        for number in range(count)
+    ))
+    return new_pks(Group, start)
+
+
+def create_posts(run, seed, users, groups, count, days, images):
+    """Вставляет посты; возвращает их pk и даты (timestamp) по порядку."""
+    end = timezone.now().timestamp()
+    span = days * 24 * 60 * 60
+    tasks = [
+        (seed, number, start, size, count, len(users), len(groups), end,
+         span, images)
+        for number, start, size in chunks(count)
+    ]
+    dates = array('d')
+
+    def posts():
+        for rows in run(post_rows, tasks):
+            for author, group, text, timestamp, image in rows:
+                dates.append(timestamp)
+                yield Post(
+                    author_id=users[author],
+                    group_id=None if group is None else groups[group],
+                    text=text,
+                    pub_date=moment(timestamp),
+                    image=image,
+                )
+
+    start = next_pk(Post)
+    with manual_dates(Post):
+        insert(Post, posts())
+    return new_pks(Post, start), dates
+
+
+def create_comments(run, seed, users, posts, dates, count):
+    tasks = [
+        (seed, number, size, len(posts), len(users))
+        for number, _, size in chunks(count)
+    ]
+
+    def comments():
+        for rows in run(comment_rows, tasks):
+            for post, author, text, minutes in rows:
+                yield Comment(
+                    post_id=posts[post],
+                    author_id=users[author],
+                    text=text,
+                    created=moment(dates[post] + minutes * 60),
+                )
+
+    with manual_dates(Comment):
+        insert(Comment, comments())
+
+
+def create_follows(run, seed, users, following):
+    tasks = [
+        (seed, number, start, size, len(users), following)
+        for number, start, size in chunks(len(users), FOLLOW_CHUNK_SIZE)
+    ]
+    insert(Follow, (
+        Follow(user_id=users[user], author_id=users[author])
+        for rows in run(follow_rows, tasks)
+        for user, author in rows
+    ))
+
+
+@contextmanager
+def runner(workers):
+    """map по частям: в процессах-работниках или в текущем процессе.
+
+    Работники только генерируют строки (и рисуют картинки), в базу
+    пишет один текущий процесс: SQLite всё равно допускает одного
+    писателя. imap отдаёт части по порядку, так что результат не
+    зависит от числа работников.
+    """
+    if workers <= 1:
+        yield map
+        return
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        yield functools.partial(pool.imap, chunksize=1)
+
+
+def seed(users=10000, posts=100000, groups=50, comments=100000,
+         following=20, days=365, seed=0, index_search=False, workers=1,
+         images=0):
+    """Создаёт набор данных; возвращает число созданных объектов.
+
+    images — доля постов с картинкой, workers — число процессов,
+    генерирующих строки.
+    """
+    with runner(workers) as run, transaction.atomic():
+        user_ids = create_users(run, seed, users)
+        group_ids = create_groups(seed, groups)
+        post_ids, dates = create_posts(
+            run, seed, user_ids, group_ids, posts, days, images)
+        if post_ids:
+            create_comments(run, seed, user_ids, post_ids, dates, comments)
+        create_follows(run, seed, user_ids, following)
+        counters.reconcile()
+        trending.rebuild()
+        stats.rebuild()
+        if feed.fanout_enabled():
+            feed.fill_inboxes()
+    if index_search:
+        search.rebuild()
+    # Страницы и карточки в общем кэше собраны по старым данным.
+    cache.clear()
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': len(post_ids),
+        'comments': comments if post_ids else 0,
+        'follows': Follow.objects.filter(
+            user_id__gte=user_ids[0]).count() if user_ids else 0,
+        'feed_entries': FeedEntry.objects.filter(
+            user_id__gte=user_ids[0]).count() if user_ids else 0,
+    }
@@ -0,0 +1,192 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cache, counters, feed, images, search, trending
+from .models import Comment, Follow, Group, Post, Profile, User
+
+# Посты, которые сейчас удаляются: их комментарии уходят каскадом, и
+# пересчитывать по каждому счётчик, рейтинг и индекс поста незачем.
+# Набор свой у каждого потока.
+_deleting = threading.local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+# Поля пользователя, которые видны на закэшированных страницах.
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Запоминает прежние имена: при переименовании страницы, где они
+    видны, нужно сбросить. Вход обновляет только last_login — его
+    пропускаем без запроса."""
+    instance._old_names = None
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+            USER_NAME_FIELDS):
+        return
+    instance._old_names = User.objects.filter(pk=instance.pk).values_list(
+        *USER_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Profile.objects.get_or_create(user=instance)
+        return
+    old_names = getattr(instance, '_old_names', None)
+    names = tuple(getattr(instance, field) for field in USER_NAME_FIELDS)
+    if old_names and old_names != names:
+        cache.bump(*cache.user_scopes(instance, old_names[0]))
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает прежние группу и картинку поста.
+
+    Страницы старой группы нужно сбросить, а для новой картинки —
+    посчитать миниатюры.
+    """
+    instance._old_group_slug = instance._old_image = None
+    if instance.pk and not raw:
+        instance._old_group_slug, instance._old_image = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group__slug', 'image').first() or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if raw:
+        return
+    if created:
+        counters.update_profile(instance.author_id, posts_count=1)
+        if feed.fanout_enabled():
+            feed.fan_out_post(instance)
+        trending.add_post(instance)
+    else:
+        cache.forget_post_page_scopes(instance.pk)
+    search.index_post(instance)
+    image = instance.image.name
+    if image and image != getattr(instance, '_old_image', None):
+        transaction.on_commit(lambda: images.schedule(image))
+    cache.bump(*cache.post_scopes(
+        instance, getattr(instance, '_old_group_slug', None)))
+
+
+@receiver(pre_delete, sender=Comment)
+def comment_deleting(sender, instance, **kwargs):
+    """Забывает посты прежних удалений.
+
+    Удаление отправляет pre_delete комментариев раньше, чем постов,
+    поэтому в наборе сейчас могут быть только посты удаления, которое
+    упало с ошибкой и не дошло до post_delete.
+    """
+    deleting_posts().clear()
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    deleting_posts().add(instance.pk)
+    # Пока комментарии на месте: их строки индекса уходят одним запросом.
+    search.remove_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+    counters.update_profile(instance.author_id, posts_count=-1)
+    cache.bump(*cache.post_scopes(instance))
+
+
+@receiver(pre_save, sender=Comment)
+def comment_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает, учитывался ли комментарий в счётчике поста."""
+    instance._was_active = False
+    if instance.pk and not raw:
+        instance._was_active = Comment.objects.filter(
+            pk=instance.pk, active=True
+        ).exists()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    delta = int(instance.active) - int(instance._was_active)
+    if delta:
+        counters.update_post(instance.post_id, delta)
+        if delta > 0:
+            trending.add(instance.post_id, trending.COMMENT_WEIGHT)
+        else:
+            trending.remove_comment(instance)
+    if instance.active or instance._was_active:
+        search.index_comment(instance)
+    cache.bump(f'post:{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts():
+        return
+    if instance.active:
+        counters.update_post(instance.post_id, -1)
+        trending.remove_comment(instance)
+        search.remove_comment(instance)
+    cache.bump(f'post:{instance.post_id}')
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает прежний слаг группы: его страницы тоже нужно сбросить."""
+    instance._old_slug = None
+    if instance.pk and not raw:
+        instance._old_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    # При удалении области считаются до того, как посты группы
+    # останутся без неё.
+    if not raw:
+        cache.bump(*cache.group_scopes(
+            instance, getattr(instance, '_old_slug', None)))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    with transaction.atomic():
+        counters.update_profile(instance.author_id, followers_count=1)
+        counters.update_profile(instance.user_id, following_count=1)
+        trending.add_follow(instance.author_id)
+    cache.bump(*cache.follow_scopes(instance))
+    if feed.fanout_enabled():
+        feed.followers_changed(instance.author_id, 1)
+        feed.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        counters.update_profile(instance.author_id, followers_count=-1)
+        counters.update_profile(instance.user_id, following_count=-1)
+    cache.bump(*cache.follow_scopes(instance))
+    if feed.fanout_enabled():
+        feed.prune(instance)
+        feed.followers_changed(instance.author_id, -1)
@@ -0,0 +1,186 @@
+"""Статистика групп из заранее посчитанных сводок.
+
+GroupDailyStats хранит число постов и комментариев группы по дням,
+GroupAuthorStats — число постов каждого автора в группе. Сводки
+дополняет update(): он агрегирует только посты и комментарии с
+первичным ключом больше сохранённого в Watermark, пакетами по
+BATCH_IDS ключей, и после каждого пакета сдвигает отметку, так что
+прерванный запуск продолжается с места остановки. Правки и удаления
+старых строк (перенос поста в другую группу, скрытый комментарий)
+в сводки не попадают — их выравнивает rebuild().
+
+Панель на странице группы (panel) читает только сводки: два запроса
+по индексам вместо агрегатов по Post и Comment.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import cache
+from .models import (Comment, Group, GroupAuthorStats, GroupDailyStats, Post,
+                     Watermark)
+
+POSTS_WATERMARK = 'group_stats_posts'
+COMMENTS_WATERMARK = 'group_stats_comments'
+BATCH_IDS = 50000
+# Не больше стольких значений в одном IN: SQLite ограничивает число
+# параметров запроса.
+MAX_IN = 900
+SPARKLINE_SIZE = (120, 24)
+
+
+def days():
+    return getattr(settings, 'GROUP_STATS_DAYS', 30)
+
+
+def top_authors():
+    return getattr(settings, 'GROUP_STATS_TOP_AUTHORS', 5)
+
+
+def existing_rows(model, keys, rows):
+    """Строки сводки model с ключами из rows: {ключ: объект}."""
+    first, second = keys
+    by_first = defaultdict(list)
+    for key in rows:
+        by_first[key[0]].append(key[1])
+    existing = {}
+    for value, others in by_first.items():
+        for start in range(0, len(others), MAX_IN):
+            for obj in model.objects.filter(**{
+                first: value, f'{second}__in': others[start:start + MAX_IN],
+            }):
+                existing[getattr(obj, first), getattr(obj, second)] = obj
+    return existing
+
+
+def merge(model, keys, rows, field):
+    """Прибавляет {ключ: число} к полю field строк сводки model."""
+    existing = existing_rows(model, keys, rows)
+    changed, created = [], []
+    for key, total in rows.items():
+        obj = existing.get(key)
+        if obj is None:
+            created.append(model(**dict(zip(keys, key)), **{field: total}))
+        else:
+            setattr(obj, field, getattr(obj, field) + total)
+            changed.append(obj)
+    model.objects.bulk_update(changed, [field], batch_size=500)
+    model.objects.bulk_create(created, batch_size=500)
+
+
+def add_posts(posts):
+    """Учитывает в сводках посты из queryset posts."""
+    posts = posts.filter(group__isnull=False).order_by()
+    daily = {
+        (row['group_id'], row['day']): row['total']
+        for row in posts.annotate(day=TruncDate('pub_date')).values(
+            'group_id', 'day').annotate(total=Count('pk'))
+    }
+    authors = {
+        (row['group_id'], row['author_id']): row['total']
+        for row in posts.values('group_id', 'author_id').annotate(
+            total=Count('pk'))
+    }
+    merge(GroupDailyStats, ('group_id', 'day'), daily, 'posts')
+    merge(GroupAuthorStats, ('group_id', 'author_id'), authors, 'posts')
+    return {group for group, _ in daily}
+
+
+def add_comments(comments):
+    """Учитывает в сводках активные комментарии из queryset comments."""
+    daily = {
+        (row['post__group_id'], row['day']): row['total']
+        for row in comments.filter(
+            active=True, post__group__isnull=False,
+        ).order_by().annotate(day=TruncDate('created')).values(
+            'post__group_id', 'day').annotate(total=Count('pk'))
+    }
+    merge(GroupDailyStats, ('group_id', 'day'), daily, 'comments')
+    return {group for group, _ in daily}
+
+
+def advance(name, model, add):
+    """Обрабатывает новые строки model пакетами; возвращает их число и
+    затронутые группы.
+
+    Отметка читается под блокировкой в каждом пакете: второй запуск
+    задачи не посчитает те же строки дважды.
+    """
+    Watermark.objects.get_or_create(name=name)
+    end = model.objects.aggregate(end=Max('pk'))['end'] or 0
+    processed, groups = 0, set()
+    while True:
+        with transaction.atomic():
+            mark = Watermark.objects.select_for_update().get(name=name)
+            if mark.last_id >= end:
+                return processed, groups
+            upper = min(mark.last_id + BATCH_IDS, end)
+            rows = model.objects.filter(pk__gt=mark.last_id, pk__lte=upper)
+            processed += rows.count()
+            groups |= add(rows)
+            mark.last_id = upper
+            mark.value = timezone.now()
+            mark.save()
+
+
+def update():
+    """Дополняет сводки новыми постами и комментариями; возвращает
+    {'posts': n, 'comments': n}."""
+    posts, groups = advance(POSTS_WATERMARK, Post, add_posts)
+    comments, comment_groups = advance(
+        COMMENTS_WATERMARK, Comment, add_comments)
+    slugs = Group.objects.filter(
+        pk__in=groups | comment_groups).values_list('slug', flat=True)
+    cache.bump(*(f'group:{slug}' for slug in slugs))
+    return {'posts': posts, 'comments': comments}
+
+
+def rebuild():
+    """Считает сводки заново по всем постам и комментариям."""
+    with transaction.atomic():
+        GroupDailyStats.objects.all().delete()
+        GroupAuthorStats.objects.all().delete()
+        Watermark.objects.filter(
+            name__in=(POSTS_WATERMARK, COMMENTS_WATERMARK)).delete()
+        return update()
+
+
+def sparkline(values, size=SPARKLINE_SIZE):
+    """Точки ломаной для <polyline>: по точке на день, максимум — вверху."""
+    width, height = size
+    peak = max(values, default=0) or 1
+    step = width / max(len(values) - 1, 1)
+    return ' '.join(
+        f'{index * step:.1f},{height - value * height / peak:.1f}'
+        for index, value in enumerate(values)
+    )
+
+
+def panel(group):
+    """Данные панели статистики группы за последние days() дней."""
+    today = timezone.localdate() if settings.USE_TZ else timezone.now().date()
+    first = today - timedelta(days=days() - 1)
+    rows = {
+        row.day: row for row in GroupDailyStats.objects.filter(
+            group=group, day__gte=first)
+    }
+    dates = [first + timedelta(days=offset) for offset in range(days())]
+    posts = [rows[day].posts if day in rows else 0 for day in dates]
+    comments = [rows[day].comments if day in rows else 0 for day in dates]
+    return {
+        'days': days(),
+        'posts': sum(posts),
+        'comments': sum(comments),
+        'posts_line': sparkline(posts),
+        'comments_line': sparkline(comments),
+        'size': SPARKLINE_SIZE,
+        'authors': GroupAuthorStats.objects.filter(
+            group=group, posts__gt=0,
+        ).select_related('author').order_by(
+            '-posts', '-pk')[:top_authors()],
+    }
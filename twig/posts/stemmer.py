@@ -0,0 +1,93 @@
+"""Облегчённый стеммер Snowball для русского языка.
+
+Отрезает окончания по правилам Snowball (деепричастия, возвратные
+частицы, прилагательные и причастия, глаголы, существительные) внутри
+области RV — части слова после первой гласной. Словообразовательные
+суффиксы (шаг 3 Snowball) не трогаются: для поиска по постам важнее
+не склеивать разные слова, чем найти все однокоренные.
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+))
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+
+
+def strip_ending(word, groups):
+    """Отрезает самое длинное окончание из groups или возвращает None.
+
+    Окончания первой группы засчитываются, только если перед ними
+    стоит «а» или «я» (сама буква остаётся в слове).
+    """
+    tied, free = groups
+    candidates = [(ending, True) for ending in tied]
+    candidates += [(ending, False) for ending in free]
+    candidates.sort(key=lambda item: len(item[0]), reverse=True)
+    for ending, needs_vowel in candidates:
+        if not word.endswith(ending):
+            continue
+        stem = word[:-len(ending)]
+        if needs_vowel and not stem.endswith(('а', 'я')):
+            continue
+        return stem
+    return None
+
+
+def optional(word, groups):
+    stripped = strip_ending(word, groups)
+    return word if stripped is None else stripped
+
+
+def stem(word):
+    """Основа русского слова; прочие слова возвращаются без изменений."""
+    position = next(
+        (i for i, letter in enumerate(word) if letter in VOWELS), None)
+    if position is None:
+        return word
+    head, rv = word[:position + 1], word[position + 1:]
+
+    stripped = strip_ending(rv, PERFECTIVE_GERUND)
+    if stripped is None:
+        rv = optional(rv, REFLEXIVE)
+        stripped = strip_ending(rv, ADJECTIVE)
+        if stripped is not None:
+            stripped = optional(stripped, PARTICIPLE)
+        else:
+            stripped = strip_ending(rv, VERB)
+            if stripped is None:
+                stripped = strip_ending(rv, NOUN)
+    if stripped is not None:
+        rv = stripped
+
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    rv = optional(rv, SUPERLATIVE)
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif rv.endswith('ь'):
+        rv = rv[:-1]
+    return head + rv
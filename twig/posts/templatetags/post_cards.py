@@ -0,0 +1,51 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.metrics import count_cache
+from posts import images
+from posts.cache import card_key, card_timeout, pending_card_timeout
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, geometry, truncate=0, profile_link=False):
+    """HTML карточек постов страницы, собранный из кэша одним get_many.
+
+    Недостающие карточки рендерятся и кэшируются; готовность их картинок
+    проверяется разом для всей страницы. Карточка, у которой картинка ещё
+    обрабатывается, живёт в кэше недолго: иначе в нём застрял бы оригинал
+    вместо миниатюры.
+    """
+    options = {
+        'geometry': geometry,
+        'truncate': truncate,
+        'profile_link': profile_link,
+    }
+    posts = list(posts)
+    keys = [card_key(post, *options.values()) for post in posts]
+    cached = cache.get_many(keys)
+    count_cache(len(cached), len(keys) - len(cached))
+    images.prefetch(
+        [post.image for post, key in zip(posts, keys) if key not in cached],
+        geometry,
+    )
+    fresh, pending = {}, {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = cached.get(key)
+        if card is None:
+            card = render_to_string(
+                'posts/includes/post_card.html', {'post': post, **options})
+            if images.is_ready(post.image, geometry):
+                fresh[key] = card
+            else:
+                pending[key] = card
+        cards.append(card)
+    if fresh:
+        cache.set_many(fresh, card_timeout())
+    if pending:
+        cache.set_many(pending, pending_card_timeout())
+    return [mark_safe(card) for card in cards]
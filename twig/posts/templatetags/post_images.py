@@ -0,0 +1,30 @@
+from django import template
+
+from posts.images import MIME_TYPES, ready_thumbnail, ready_variants
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(image, geometry):
+    """Миниатюра картинки поста, а пока её нет — сама картинка.
+
+    Если готовы варианты в WebP/AVIF, они добавляются источниками
+    <picture> с srcset по ширинам.
+    """
+    width, _, height = geometry.partition('x')
+    sources = [
+        {
+            'type': MIME_TYPES.get(fmt, f'image/{fmt}'),
+            'srcset': ', '.join(f'{url} {w}w' for w, url in variants),
+        }
+        for fmt, variants in (ready_variants(image) or {}).items()
+    ]
+    return {
+        'image': image,
+        'thumbnail': ready_thumbnail(image, geometry),
+        'sources': sources,
+        'sizes': f'(max-width: {width}px) 100vw, {width}px',
+        'width': width,
+        'height': height or width,
+    }
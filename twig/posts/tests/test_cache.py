@@ -0,0 +1,154 @@
+import hashlib
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from core import db
+from core.db import ReadWriteRouter
+
+from .. import cache as page_cache
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Ilya')
+        cls.group = Group.objects.create(
+            title='Басни',
+            slug='basni',
+            description='Тут будут басни',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Первый пост',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_pages_invalidated_by_new_post(self):
+        """Новый пост сразу виден на закэшированных страницах."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+            self.assertIsNone(self.guest_client.get(url).context)
+        Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_post_detail_invalidated_by_comment(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий')
+        self.assertContains(self.guest_client.get(url), 'Новый комментарий')
+
+    def test_group_change_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает страницу старой."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.assertContains(self.guest_client.get(url), 'Первый пост')
+        self.post.group = None
+        self.post.save()
+        self.assertNotContains(self.guest_client.get(url), 'Первый пост')
+
+    def test_stale_page_served_while_locked(self):
+        """Пока страницу пересчитывает другой процесс, отдаём старую копию."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url)
+        page_cache.bump('index')
+        path = first.wsgi_request.get_full_path()
+        lock = page_cache.LOCK_KEY.format(
+            'index', hashlib.md5(path.encode()).hexdigest())
+        cache.add(lock, 1)
+        response = self.guest_client.get(url)
+        self.assertIsNone(response.context)
+        self.assertEqual(response.content, first.content)
+
+    def test_authenticated_users_bypass_cache(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('posts:index'))
+        self.assertIsNotNone(client.get(reverse('posts:index')).context)
+
+    def test_cached_response_keeps_headers(self):
+        """Из кэша отдаются все заголовки ответа, а не только тип."""
+        @page_cache.cached_page('index')
+        def view(request):
+            response = HttpResponse('<p>Страница</p>')
+            response['Vary'] = 'Accept-Language'
+            response['Content-Language'] = 'ru'
+            return response
+
+        request = RequestFactory().get('/headers/')
+        request.user = AnonymousUser()
+        view(request)
+        cached = view(request)
+        self.assertEqual(cached.content, '<p>Страница</p>'.encode())
+        self.assertEqual(cached['Vary'], 'Accept-Language')
+        self.assertEqual(cached['Content-Language'], 'ru')
+        self.assertEqual(cached['Content-Type'], 'text/html; charset=utf-8')
+
+
+class BumpOnCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_version_changed_again_after_commit(self):
+        """Страница, собранная до коммита, устаревает после него."""
+        with transaction.atomic():
+            page_cache.bump('index')
+            inside = page_cache.version('index')
+        self.assertGreater(page_cache.version('index'), inside)
+
+    def test_rolled_back_bump_not_repeated(self):
+        with transaction.atomic():
+            page_cache.bump('index')
+            inside = page_cache.version('index')
+            transaction.set_rollback(True)
+        self.assertEqual(page_cache.version('index'), inside)
+
+
+class ReplicaLagTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        db.reset()
+
+    @override_settings(DATABASE_PRIMARY_STICKY_SECONDS=10)
+    @mock.patch('core.db.replica_aliases', return_value=['replica'])
+    def test_fresh_version_rendered_from_primary(self, replicas):
+        """Сразу после смены версии страница читается не из реплики."""
+        reads = []
+
+        @page_cache.cached_page('index')
+        def view(request):
+            reads.append(ReadWriteRouter().db_for_read(Post))
+            return HttpResponse('<p>Страница</p>')
+
+        request = RequestFactory().get('/fresh/')
+        request.user = AnonymousUser()
+        page_cache.bump('index')
+        view(request)
+        cache.set(
+            page_cache.VERSION_KEY.format(page_cache.safe('index')),
+            page_cache.now_ms() - 11000)
+        view(request)
+        self.assertEqual(reads, ['default', 'replica'])
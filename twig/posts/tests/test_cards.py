@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import card_key, pending_card_timeout
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Ilya', first_name='Илья')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        # Вошедшим страницы не кэшируются целиком — проверяем карточки.
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def get_index(self):
+        return self.client.get(reverse('posts:index')).content.decode()
+
+    def test_cards_rendered_once(self):
+        """Повторный показ ленты собирает карточки из кэша."""
+        self.get_index()
+        with mock.patch(
+            'posts.templatetags.post_cards.render_to_string'
+        ) as render:
+            html = self.get_index()
+        render.assert_not_called()
+        self.assertIn('Первый пост', html)
+
+    def test_card_follows_post_author_and_group(self):
+        self.get_index()
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertIn('Исправленный пост', self.get_index())
+        User.objects.filter(pk=self.author.pk).update(first_name='Илюша')
+        self.assertIn('Илюша', self.get_index())
+        Group.objects.filter(pk=self.group.pk).update(title='Кошки')
+        self.assertIn('группы: Кошки', self.get_index())
+
+    def test_pending_image_cached_briefly(self):
+        """Карточку с недоделанной миниатюрой кэшируем ненадолго."""
+        Post.objects.filter(pk=self.post.pk).update(image='posts/new.jpg')
+        with mock.patch.object(
+            cache, 'set_many', wraps=cache.set_many
+        ) as set_many, self.assertLogs('posts.images', 'WARNING'):
+            self.get_index()
+        post = Post.objects.with_related().get(pk=self.post.pk)
+        key = card_key(post, '600x600', 200, False)
+        set_many.assert_any_call({key: mock.ANY}, pending_card_timeout())
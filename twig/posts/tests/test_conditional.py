@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ilya')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_page_not_rendered(self):
+        """Неизменившаяся страница отдаётся как 304 без шаблонов."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        self.assertIn('Cookie', response['Vary'])
+        repeat = self.revalidate(self.client, url, response)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.templates, [])
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Новый комментарий')
+        self.assertEqual(
+            self.revalidate(self.client, url, response).status_code, 200)
+
+    def test_post_page_follows_author_and_group(self):
+        """Страница поста сбрасывается новым постом автора и
+        переименованием автора или группы."""
+        author = User.objects.create_user(username='writer')
+        group = Group.objects.create(title='Кошки', slug='cats')
+        post = Post.objects.create(author=author, group=group, text='Пост')
+        url = reverse('posts:post_detail', args=[post.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Всего постов автора: 1')
+        Post.objects.create(author=author, text='Ещё пост')
+        self.assertEqual(
+            self.revalidate(self.client, url, response).status_code, 200)
+        self.assertContains(self.client.get(url), 'Всего постов автора: 2')
+        author.first_name = 'Пётр'
+        author.save()
+        self.assertContains(self.client.get(url), 'Пётр')
+        group.title = 'Коты'
+        group.save()
+        self.assertContains(self.client.get(url), 'Группа: Коты')
+
+    def test_last_modified_for_anonymous(self):
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        repeat = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(repeat.status_code, 304)
+        response = self.reader_client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            304,
+        )
+
+    def test_follow_feed_is_per_user(self):
+        url = reverse('posts:follow_index')
+        response = self.reader_client.get(url)
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            304,
+        )
+        other = Client()
+        other.force_login(self.author)
+        self.assertEqual(
+            self.revalidate(other, url, response).status_code, 200)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, response).status_code,
+            200,
+        )
+
+    def test_new_post_changes_validators(self):
+        url = reverse('posts:profile', args=['Ilya'])
+        response = self.client.get(url)
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(
+            self.revalidate(self.client, url, response).status_code, 200)
@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models.signals import pre_delete
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Comment, Follow, Post, Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Ilya')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_profile_created_with_user(self):
+        self.assertTrue(Profile.objects.filter(user=self.author).exists())
+
+    def test_post_counter(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.create(author=self.author, text='Текст 2')
+        self.assertEqual(self.profile(self.author).posts_count, 2)
+        post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+
+    def test_follow_counters(self):
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_comment_counter_counts_active_only(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        Comment.objects.create(
+            post=post, author=self.reader, text='Скрытый', active=False)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.active = False
+        comment.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        comment.active = True
+        comment.save()
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_delete_post_skips_per_comment_work(self):
+        """Удаление поста не обрабатывает каждый комментарий отдельно."""
+        counts = []
+        for total in (1, 20):
+            post = Post.objects.create(author=self.author, text='Текст')
+            Comment.objects.bulk_create(
+                Comment(post=post, author=self.reader, text=f'К {index}')
+                for index in range(total)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                post.delete()
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+    def test_failed_post_delete_not_remembered(self):
+        """После упавшего удаления поста его комментарии снова
+        учитываются при удалении."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+
+        def fail(sender, instance, **kwargs):
+            raise DatabaseError('сбой')
+
+        pre_delete.connect(fail, sender=Post)
+        self.addCleanup(pre_delete.disconnect, fail, sender=Post)
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            post.delete()
+        pre_delete.disconnect(fail, sender=Post)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_delete_user_with_follows_and_posts(self):
+        """Каскадное удаление пользователя не ломает счётчики других."""
+        user = User.objects.create_user(username='leaving')
+        Follow.objects.create(user=self.reader, author=user)
+        Follow.objects.create(user=user, author=self.author)
+        post = Post.objects.create(author=user, text='Текст')
+        Post.objects.create(author=user, text='Текст 2')
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        other_post = Post.objects.create(author=self.author, text='Чужой')
+        Comment.objects.create(post=other_post, author=user, text='!')
+        user_id = user.pk
+        user.delete()
+        self.assertFalse(Profile.objects.filter(user_id=user_id).exists())
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        other_post.refresh_from_db()
+        self.assertEqual(other_post.comments_count, 0)
+
+    def test_reconcile_fixes_drift(self):
+        """Команда пересчёта исправляет рассинхронизацию счётчиков."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        Post.objects.filter(pk=post.pk).update(comments_count=7)
+        Profile.objects.filter(user=self.author).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
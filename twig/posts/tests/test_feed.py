@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import feed
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT=True, FEED_FANOUT_MAX_FOLLOWERS=1000)
+class FeedFanoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Старый пост',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed_texts(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_backfills_inbox(self):
+        """Подписка переносит старые посты автора во входящую ленту."""
+        self.client.get(reverse('posts:profile_follow', args=['writer']))
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=self.old_post).exists())
+        self.assertEqual(self.feed_texts(), ['Старый пост'])
+
+    def test_new_post_fanned_out(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.other, text='Чужой пост')
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_texts(), ['Новый пост', 'Старый пост'])
+
+    def test_unfollow_prunes_inbox(self):
+        """Отписка удаляет посты автора из входящей ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.get(reverse('posts:profile_unfollow', args=['writer']))
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_texts(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_prolific_author_merged_on_read(self):
+        """Посты популярных авторов подмешиваются в ленту при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_texts(), ['Новый пост', 'Старый пост'])
+
+    def test_author_crossing_threshold_keeps_posts(self):
+        """Смена режима автора не теряет его посты ни в одну сторону."""
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=self.reader, author=self.author)
+        with override_settings(FEED_FANOUT_MAX_FOLLOWERS=1):
+            Follow.objects.create(user=fan, author=self.author)
+            self.assertTrue(feed.is_prolific(self.author.pk))
+            self.assertFalse(
+                FeedEntry.objects.filter(author=self.author).exists())
+            Post.objects.create(author=self.author, text='Новый пост')
+            self.assertEqual(
+                self.feed_texts(), ['Новый пост', 'Старый пост'])
+            Follow.objects.filter(user=fan).delete()
+            self.assertFalse(feed.is_prolific(self.author.pk))
+            self.assertEqual(FeedEntry.objects.filter(
+                user=self.reader, author=self.author).count(), 2)
+            self.assertEqual(
+                self.feed_texts(), ['Новый пост', 'Старый пост'])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_cursor_pages_merge_inbox_and_prolific(self):
+        """Курсор листает слитую ленту без пропусков и повторов."""
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.other)
+        now = timezone.now()
+        expected = []
+        for index in range(7):
+            author = self.author if index % 2 else self.other
+            post = Post.objects.create(author=author, text=f'Пост {index}')
+            for model, field in ((Post, 'pk'), (FeedEntry, 'post')):
+                model.objects.filter(**{field: post.pk}).update(
+                    pub_date=now - timedelta(minutes=index))
+            expected.append(f'Пост {index}')
+        expected.append('Старый пост')
+        for model, field in ((Post, 'pk'), (FeedEntry, 'post')):
+            model.objects.filter(**{field: self.old_post.pk}).update(
+                pub_date=now - timedelta(days=1))
+        paginator = feed.paginator(self.reader, 3)
+        texts, page = [], paginator.get_page(None)
+        while True:
+            texts += [post.text for post in page]
+            if not page.has_next():
+                break
+            page = paginator.get_page(None, cursor=page.next_cursor)
+        self.assertEqual(texts, expected)
+        previous = paginator.get_page(None, cursor=page.previous_cursor)
+        self.assertEqual([post.text for post in previous], expected[3:6])
@@ -0,0 +1,133 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from .. import cache as page_cache
+from .. import images
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.jpg', size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Ilya')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text='С картинкой', image=make_image())
+
+    def render(self):
+        return Template(
+            '{% load post_images %}{% post_image post.image "300x300" %}'
+        ).render(Context({'post': self.post}))
+
+    def test_original_shown_until_ready(self):
+        """Пока миниатюры нет, шаблон не создаёт её, а отдаёт оригинал."""
+        html = self.render()
+        self.assertIn(self.post.image.url, html)
+        self.assertIsNone(images.ready_thumbnail(self.post.image, '300x300'))
+
+    def test_thumbnail_shown_when_ready(self):
+        images.schedule(self.post.image.name)
+        thumbnail = images.ready_thumbnail(self.post.image, '300x300')
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual(thumbnail.width, 300)
+        html = self.render()
+        self.assertIn(thumbnail.url, html)
+        self.assertNotIn(self.post.image.url, html)
+
+    def test_generation_bumps_post_pages(self):
+        """После генерации миниатюр страницы поста пересобираются."""
+        scope = f'post:{self.post.pk}'
+        before = page_cache.version(scope)
+        images.schedule(self.post.image.name)
+        self.assertGreater(page_cache.version(scope), before)
+
+    def test_backfill_command(self):
+        call_command('build_thumbnails', workers=1, stdout=StringIO())
+        for size in images.thumbnail_sizes():
+            with self.subTest(size=size):
+                self.assertIsNotNone(
+                    images.ready_thumbnail(self.post.image, size))
+
+    def test_variants_in_picture(self):
+        """Варианты WebP отдаются через <picture> с srcset по ширинам."""
+        self.assertNotIn('<picture>', self.render())
+        images.schedule(self.post.image.name)
+        html = self.render()
+        self.assertIn('<picture>', html)
+        self.assertIn('type="image/webp"', html)
+        for width in (320, 640, 800):
+            path = images.variant_name(self.post.image.name, width, 'webp')
+            self.assertTrue(default_storage.exists(path))
+            self.assertIn(f'{default_storage.url(path)} {width}w', html)
+        self.assertNotIn(' 960w', html)
+
+    def test_variants_reused(self):
+        """Готовые варианты не пересчитываются и находятся без кэша."""
+        name = self.post.image.name
+        images.build_variants(name)
+        path = images.variant_name(name, 320, 'webp')
+        modified = default_storage.get_modified_time(path)
+        images.build_variants(name)
+        self.assertEqual(default_storage.get_modified_time(path), modified)
+        cache.clear()
+        self.assertIn('webp', images.ready_variants(self.post.image))
+
+    def test_missing_file_warned_once(self):
+        """Пропавший файл: одно предупреждение без трассировки и отметка."""
+        post = Post.objects.create(
+            author=self.user, text='Без файла', image='posts/missing.jpg')
+        with self.assertLogs('posts.images', 'WARNING') as logs:
+            self.assertIsNone(images.ready_variants(post.image))
+            self.assertIsNone(images.ready_variants(post.image))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsNone(logs.records[0].exc_info)
+        key = images.VARIANTS_KEY.format(images.source_digest(post.image.name))
+        self.assertIs(cache.get(key), False)
+
+    def test_prefetch_batches_lookups(self):
+        """Готовность картинок страницы узнаётся одним запросом к базе."""
+        posts = [self.post] + [
+            Post.objects.create(
+                author=self.user, text=f'Пост {index}',
+                image=make_image(f'photo{index}.jpg', (40, 30)))
+            for index in range(4)
+        ]
+        images.schedule(posts[1].image.name)
+        cache.clear()
+        files = [post.image for post in posts]
+        with CaptureQueriesContext(connection) as queries:
+            images.prefetch(files, '300x300')
+            ready = [images.is_ready(file_, '300x300') for file_ in files]
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(ready, [False, True, False, False, False])
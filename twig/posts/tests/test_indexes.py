@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from posts.models import Follow, Group, Post, User
+
+BEFORE = [('posts', '0012_search')]
+AFTER = [('posts', '0013_follow_unique_indexes')]
+
+
+class FollowDedupMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_duplicates_removed_and_counters_fixed(self):
+        apps = self.migrate(BEFORE)
+        OldUser = apps.get_model('auth', 'User')
+        OldFollow = apps.get_model('posts', 'Follow')
+        OldProfile = apps.get_model('posts', 'Profile')
+        reader = OldUser.objects.create(username='reader')
+        author = OldUser.objects.create(username='author')
+        for user in (reader, author):
+            OldProfile.objects.create(user=user)
+        first = OldFollow.objects.create(user=reader, author=author)
+        OldFollow.objects.create(user=reader, author=author)
+        OldProfile.objects.filter(pk=author.pk).update(followers_count=2)
+
+        apps = self.migrate(AFTER)
+        NewProfile = apps.get_model('posts', 'Profile')
+        self.assertEqual(
+            list(Follow.objects.values_list('pk', flat=True)), [first.pk])
+        self.assertEqual(
+            NewProfile.objects.get(pk=author.pk).followers_count, 1)
+        self.assertEqual(
+            NewProfile.objects.get(pk=reader.pk).following_count, 1)
+
+
+class AccessPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=cls.author, group=group, text='Пост')
+
+    def test_follow_is_unique(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_feeds_use_composite_indexes(self):
+        output = StringIO()
+        call_command('explain_queries', no_color=True, stdout=output)
+        plans = output.getvalue()
+        for index in ('post_author_pub_date_idx', 'post_group_pub_date_idx',
+                      'comment_active_created_idx'):
+            self.assertIn(index, plans)
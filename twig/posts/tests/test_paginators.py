@@ -0,0 +1,99 @@
+import base64
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..paginators import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Ilya')
+        Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=cls.user) for i in range(25)
+        )
+        # bulk_create может выдать одинаковые pub_date — проверяем,
+        # что сортировка по (pub_date, id) не теряет и не дублирует посты.
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def paginate(self, cursor=None):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        return paginator.get_page(cursor=cursor)
+
+    def test_walk_forward_and_back(self):
+        """Проход вперёд и назад по курсорам возвращает те же страницы."""
+        first = self.paginate()
+        second = self.paginate(first.next_cursor)
+        third = self.paginate(second.next_cursor)
+        seen = [post.pk for page in (first, second, third) for post in page]
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(third.number, 3)
+        self.assertFalse(third.has_next())
+        back = self.paginate(third.previous_cursor)
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in second])
+        self.assertEqual(back.number, 2)
+        self.assertEqual(
+            [post.pk for post in self.paginate(back.previous_cursor)],
+            [post.pk for post in first],
+        )
+
+    def test_no_count_query(self):
+        """Страница по курсору не выполняет COUNT(*) и один запрос."""
+        cursor = self.paginate().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            page = self.paginate(cursor)
+            self.assertEqual(len(page), 10)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = self.paginate('не-курсор')
+        self.assertEqual(page.number, 1)
+        self.assertEqual(page[0].pk, self.expected[0])
+
+    def test_cursor_with_wrong_value_types(self):
+        """Курсор с нестроковыми значениями ключа — первая страница."""
+        for values in ([{'a': 1}, 1], [[1], 1], ['2020-01-01', {'b': 2}]):
+            data = json.dumps([0, 2, *values]).encode()
+            cursor = base64.urlsafe_b64encode(data).decode().rstrip('=')
+            page = self.paginate(cursor)
+            self.assertEqual(page.number, 1)
+            self.assertEqual(page[0].pk, self.expected[0])
+
+    def test_page_number_without_count(self):
+        """?page=N читает страницу через OFFSET без COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_page(3)
+            self.assertEqual(
+                [post.pk for post in page], self.expected[20:])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+        self.assertFalse(page.has_next())
+        self.assertEqual(page.number, 3)
+        self.assertEqual(paginator.get_page(99).number, 1)
+
+    def test_cursor_links_on_index(self):
+        """Главная страница отдаёт ссылку на следующую страницу курсором."""
+        response = Client().get(reverse('posts:index'))
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'?cursor={next_cursor}')
+        response = Client().get(
+            reverse('posts:index'), {'cursor': next_cursor})
+        self.assertEqual(response.context['page_obj'].number, 2)
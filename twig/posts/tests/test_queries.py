@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import budget_for, query_budget
+from .. import images
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(TestCase):
+    """Число запросов страниц не зависит от количества постов.
+
+    У каждого поста своя картинка; у половины миниатюры готовы, у
+    половины ещё нет, а кэш перед каждым тестом пуст.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Ilya', first_name='Илья', last_name='Ф')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Басни', slug='basni', description='Тут будут басни')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for index in range(12):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Пост {index}',
+                image=SimpleUploadedFile(
+                    f'small{index}.gif', SMALL_GIF, 'image/gif'),
+            )
+            if index % 2:
+                images.generate(cls.post.image.name)
+            Comment.objects.create(
+                author=User.objects.create_user(username=f'guest{index}'),
+                post=cls.post,
+                text=f'Комментарий {index}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_views_within_budget(self):
+        pages = (
+            ('posts:index', ()),
+            ('posts:group_list', (self.group.slug,)),
+            ('posts:profile', (self.author.username,)),
+            ('posts:post_detail', (self.post.pk,)),
+            ('posts:follow_index', ()),
+        )
+        for name, args in pages:
+            with self.subTest(view=name):
+                with query_budget(budget_for(name), label=name):
+                    response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_middleware_logs_overrun(self):
+        with self.assertLogs('twig.query_budget', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
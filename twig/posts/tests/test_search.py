@@ -0,0 +1,122 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTermsTests(TestCase):
+    def test_russian_word_forms(self):
+        """Словоформы и «ё» сводятся к одной основе, служебные слова —
+        отбрасываются."""
+        self.assertEqual(search.terms('Кошками и ёлками'), ['кошк', 'елк'])
+        self.assertEqual(search.terms('кошка ЕЛКА'), ['кошк', 'елк'])
+
+
+class SearchIndexTests(TestCase):
+    fts = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Ilya')
+
+    def setUp(self):
+        patcher = mock.patch.object(search, 'has_fts', return_value=self.fts)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, text):
+        return Post.objects.create(author=self.user, text=text)
+
+    def test_backend(self):
+        self.assertIsInstance(
+            search.get_index(),
+            search.FTSIndex if self.fts else search.TermIndex,
+        )
+
+    def test_finds_word_forms_ranked(self):
+        """Совпадение в тексте поста весит больше, чем в комментарии."""
+        in_comment = self.post('Про погоду')
+        Comment.objects.create(
+            post=in_comment, author=self.user, text='А у меня кошки')
+        in_text = self.post('Мои кошки спят')
+        self.post('Про собак')
+        self.assertEqual(search.search('кошка'), [in_text.pk, in_comment.pk])
+        self.assertEqual(search.search('кошками спят'), [in_text.pk])
+        self.assertEqual(search.search('и'), [])
+
+    def test_prefix_match(self):
+        """Основа запроса находит более длинные основы в обоих индексах."""
+        long_word = self.post('Люблю программирование')
+        self.post('Программа передач')
+        self.post('Про прогулки')
+        self.assertIn(long_word.pk, search.search('программ'))
+        self.assertEqual(len(search.search('программ')), 2)
+        self.assertEqual(search.search('программ люблю'), [long_word.pk])
+
+    def test_index_follows_changes(self):
+        post = self.post('Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(search.search('старый'), [])
+        self.assertEqual(search.search('новые'), [post.pk])
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Скрытый комментарий')
+        self.assertEqual(search.search('скрытый'), [post.pk])
+        comment.active = False
+        comment.save()
+        self.assertEqual(search.search('скрытый'), [])
+        post.delete()
+        self.assertEqual(search.search('новый'), [])
+
+    def test_comment_indexed_alone(self):
+        """Новый комментарий индексируется без остальных комментариев
+        поста, а запрос находит основы и в тексте, и в комментариях."""
+        post = self.post('Мои кошки')
+        for text in ('Первый', 'Второй'):
+            Comment.objects.create(post=post, author=self.user, text=text)
+        with mock.patch.object(
+                search, 'terms', wraps=search.terms) as terms:
+            comment = Comment.objects.create(
+                post=post, author=self.user, text='Спят весь день')
+        terms.assert_called_once_with('Спят весь день')
+        self.assertEqual(search.search('кошки спят'), [post.pk])
+        comment.delete()
+        self.assertEqual(search.search('кошки спят'), [])
+        self.assertEqual(search.search('кошки первый'), [post.pk])
+
+    def test_rebuild_command(self):
+        Post.objects.bulk_create([Post(author=self.user, text='Массовый')])
+        self.assertEqual(search.search('массовый'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(search.search('массовый')), 1)
+        self.assertEqual(SearchTerm.objects.exists(), not self.fts)
+
+
+class TermSearchIndexTests(SearchIndexTests):
+    """То же на индексе SearchTerm, который используется без FTS5."""
+    fts = False
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='Ilya')
+        for i in range(12):
+            Post.objects.create(author=user, text=f'Заметка про кошку {i}')
+
+    def test_paginated_results(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'кошки'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 12)
+        self.assertEqual(len(page_obj.object_list), 10)
+        self.assertIsInstance(page_obj[0], Post)
+        self.assertContains(
+            response, '?q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B8&amp;page=2')
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import F
+from django.test import TestCase
+
+from posts import counters, seeding
+from posts.models import FeedEntry, Follow, Post
+
+SMALL = {'users': 30, 'posts': 60, 'groups': 3, 'comments': 40,
+         'following': 5, 'seed': 7}
+
+
+class SeedingTests(TestCase):
+    def snapshot(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'author__username', 'text', 'pub_date__date'))
+
+    def test_same_seed_same_data(self):
+        with transaction.atomic():
+            seeding.seed(**SMALL)
+            first = self.snapshot()
+            transaction.set_rollback(True)
+        seeding.seed(**SMALL)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_counters_and_feeds_consistent(self):
+        created = seeding.seed(**SMALL)
+        self.assertEqual(created['posts'], 60)
+        self.assertEqual(counters.reconcile(), 0)
+        self.assertFalse(
+            Follow.objects.filter(user=F('author')).exists())
+        self.assertTrue(FeedEntry.objects.exists())
+
+    def test_workers_do_not_change_data(self):
+        with transaction.atomic():
+            seeding.seed(**SMALL)
+            first = self.snapshot()
+            transaction.set_rollback(True)
+        seeding.seed(workers=2, **SMALL)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_seed_command_with_images(self):
+        with tempfile.TemporaryDirectory() as media:
+            with self.settings(MEDIA_ROOT=media):
+                output = StringIO()
+                call_command(
+                    'seed', users=10, posts=20, groups=2, images=0.5,
+                    workers=1, stdout=output,
+                )
+                images = Post.objects.exclude(image='')
+                self.assertTrue(images.exists())
+                for post in images:
+                    self.assertTrue(os.path.exists(post.image.path))
+        self.assertIn('posts: 20', output.getvalue())
+
+
+class BenchViewsTests(TestCase):
+    def test_report_and_baseline(self):
+        seeding.seed(**SMALL)
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            call_command(
+                'bench_views', requests=3, warmup=1, save=baseline,
+                only=['index', 'post_detail', 'add_comment'],
+                stdout=StringIO(),
+            )
+            with open(baseline) as file:
+                report = json.load(file)
+            self.assertEqual(
+                set(report['results']),
+                {'index', 'post_detail', 'add_comment'})
+            self.assertGreater(report['results']['index']['queries_max'], 0)
+            output = StringIO()
+            call_command(
+                'bench_views', requests=3, warmup=1, compare=baseline,
+                only=['index'], stdout=output,
+            )
+            self.assertIn('Сравнение с', output.getvalue())
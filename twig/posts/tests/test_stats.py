@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.query_budget import budget_for, query_budget
+from posts import stats
+from posts.models import (Comment, Group, GroupAuthorStats, GroupDailyStats,
+                          Post)
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый')
+        Post.objects.create(author=cls.reader, group=cls.group, text='Второй')
+        Post.objects.create(author=cls.author, text='Без группы')
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+
+    def setUp(self):
+        cache.clear()
+
+    def today(self):
+        return GroupDailyStats.objects.get(
+            group=self.group, day=timezone.now().date())
+
+    def test_update_processes_only_new_rows(self):
+        self.assertEqual(stats.update(), {'posts': 3, 'comments': 1})
+        self.assertEqual(
+            (self.today().posts, self.today().comments), (2, 1))
+        self.assertEqual(stats.update(), {'posts': 0, 'comments': 0})
+        Post.objects.create(author=self.author, group=self.group, text='3')
+        Comment.objects.create(post=self.post, author=self.author, text='Нет')
+        self.assertEqual(stats.update(), {'posts': 1, 'comments': 1})
+        self.assertEqual(
+            (self.today().posts, self.today().comments), (3, 2))
+        self.assertEqual(
+            GroupAuthorStats.objects.get(
+                group=self.group, author=self.author).posts, 2)
+
+    def test_rebuild_after_edits(self):
+        stats.update()
+        self.post.group = None
+        self.post.save()
+        stats.update()
+        self.assertEqual(self.today().posts, 2)
+        stats.rebuild()
+        self.assertEqual(
+            (self.today().posts, self.today().comments), (1, 0))
+
+    def test_group_page_reads_rollup(self):
+        stats.update()
+        url = reverse('posts:group_list', args=[self.group.slug])
+        with query_budget(budget_for('posts:group_list'), 'group_list'):
+            response = self.client.get(url)
+        panel = response.context['stats']
+        self.assertEqual((panel['posts'], panel['comments']), (2, 1))
+        self.assertEqual(
+            {row.author for row in panel['authors']},
+            {self.reader, self.author})
+        self.assertContains(response, '<polyline')
+
+    def test_sparkline(self):
+        self.assertEqual(
+            stats.sparkline([0, 2, 1], (10, 4)), '0.0,4.0 5.0,0.0 10.0,2.0')
@@ -0,0 +1,145 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from posts import seeding, transfer
+from posts.models import (Comment, FeedEntry, Follow, Group, Post, Profile,
+                          User)
+
+SMALL = {'users': 20, 'posts': 40, 'groups': 2, 'comments': 30,
+         'following': 4, 'seed': 3}
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        seeding.seed(**SMALL)
+
+    def clear(self):
+        """Пустая база, как перед загрузкой: без сигналов и каскадов."""
+        with connection.cursor() as cursor:
+            for model in (FeedEntry, Comment, Follow, Post, Group, Profile,
+                          User):
+                cursor.execute(f'DELETE FROM {model._meta.db_table}')
+
+    def snapshot(self):
+        return {
+            'users': list(User.objects.order_by('pk').values_list(
+                'pk', 'username', 'password')),
+            'posts': list(Post.objects.order_by('pk').values_list(
+                'pk', 'author_id', 'group_id', 'text', 'pub_date')),
+            'comments': list(Comment.objects.order_by('pk').values_list(
+                'pk', 'post_id', 'created', 'text')),
+            'follows': list(Follow.objects.order_by('pk').values_list(
+                'user_id', 'author_id')),
+            'feeds': FeedEntry.objects.count(),
+            'profiles': list(User.objects.order_by('pk').values_list(
+                'profile__followers_count', 'profile__posts_count')),
+        }
+
+    def test_round_trip_gzip(self):
+        path = os.path.join(self.directory, 'graph.ndjson.gz')
+        before = self.snapshot()
+        counts = transfer.export(path, chunk_size=7)
+        self.assertEqual(counts['posts.post'], 40)
+        with gzip.open(path, 'rt') as stream:
+            self.assertEqual(
+                json.loads(stream.readline())['format'], transfer.FORMAT)
+        self.clear()
+        transfer.load(path, chunk_size=7)
+        self.assertEqual(self.snapshot(), before)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_load_resumes_after_failure(self):
+        path = os.path.join(self.directory, 'graph.ndjson')
+        transfer.export(path, chunk_size=7)
+        before = self.snapshot()
+        self.clear()
+        build = transfer.build
+        calls = []
+
+        def failing(model, fields):
+            calls.append(model)
+            if len(calls) == 50:
+                raise RuntimeError('сбой')
+            return build(model, fields)
+
+        with mock.patch('posts.transfer.build', failing):
+            with self.assertRaises(RuntimeError):
+                transfer.load(path, chunk_size=7)
+        self.assertTrue(os.path.exists(f'{path}.checkpoint'))
+        transfer.load(path, chunk_size=7)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_export_resumes_after_torn_write(self):
+        """После сбоя файл обрезается до контрольной точки: ни
+        оборванной строки, ни повторов."""
+        before = self.snapshot()
+        dumps = transfer.dumps
+        for name in ('graph.ndjson', 'graph.ndjson.gz'):
+            with self.subTest(name=name):
+                path = os.path.join(self.directory, name)
+                calls = []
+
+                def failing(data):
+                    calls.append(data)
+                    if len(calls) == 40:
+                        raise RuntimeError('сбой')
+                    return dumps(data)
+
+                with mock.patch('posts.transfer.dumps', failing):
+                    with self.assertRaises(RuntimeError):
+                        transfer.export(path, chunk_size=7)
+                # Пакет, который успел записаться лишь наполовину.
+                with open(path, 'ab') as file:
+                    file.write(b'\x1f\x8b\x08{"model":"posts.po')
+                counts = transfer.export(path, chunk_size=7)
+                self.assertEqual(counts['posts.post'], 40)
+                with transfer.open_stream(path, 'r') as stream:
+                    lines = stream.readlines()
+                self.assertEqual(len(lines), len(set(lines)))
+                self.assertEqual(len(lines), 1 + sum(counts.values()))
+        self.clear()
+        transfer.load(path)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_export_restarts_when_file_is_short(self):
+        """Файл короче контрольной точки — выгрузка начинается заново."""
+        path = os.path.join(self.directory, 'graph.ndjson')
+        transfer.Checkpoint(path).save({
+            'model': 2, 'last_pk': 5, 'offset': 10 ** 6,
+            'counts': {'auth.user': 20, 'posts.group': 2, 'posts.post': 3},
+        })
+        counts = transfer.export(path)
+        self.assertEqual(counts['auth.user'], 20)
+        self.assertEqual(counts['posts.post'], 40)
+
+    def test_load_refuses_non_empty_database(self):
+        path = os.path.join(self.directory, 'graph.ndjson')
+        transfer.export(path)
+        with self.assertRaisesMessage(ValueError, 'База не пуста'):
+            transfer.load(path)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_media_manifest(self):
+        media = os.path.join(self.directory, 'media')
+        os.makedirs(os.path.join(media, 'posts'))
+        with open(os.path.join(media, 'posts', 'cat.jpg'), 'wb') as file:
+            file.write(b'cat')
+        Post.objects.filter(pk=Post.objects.first().pk).update(
+            image='posts/cat.jpg')
+        manifest = os.path.join(self.directory, 'media.ndjson')
+        with override_settings(MEDIA_ROOT=media):
+            self.assertEqual(transfer.export_media_manifest(manifest), 1)
+            self.assertEqual(transfer.check_media_manifest(manifest), [])
+            with open(os.path.join(media, 'posts', 'cat.jpg'), 'wb') as file:
+                file.write(b'dog')
+            self.assertEqual(
+                transfer.check_media_manifest(manifest), ['posts/cat.jpg'])
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.query_budget import budget_for, query_budget
+from posts import trending
+from posts.models import Comment, Follow, Post, PostScore, Watermark
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.quiet = Post.objects.create(author=cls.author, text='Тихий пост')
+        cls.hot = Post.objects.create(author=cls.author, text='Горячий пост')
+        for index in range(3):
+            Comment.objects.create(
+                post=cls.hot, author=cls.reader, text=f'Ответ {index}')
+
+    def setUp(self):
+        cache.clear()
+
+    def score(self, post):
+        return PostScore.objects.get(post=post).score
+
+    def test_comments_and_follows_update_scores(self):
+        self.assertEqual(self.score(self.quiet), trending.POST_WEIGHT)
+        self.assertEqual(
+            self.score(self.hot),
+            trending.POST_WEIGHT + 3 * trending.COMMENT_WEIGHT)
+        comment = self.hot.comments.first()
+        comment.active = False
+        comment.save()
+        self.assertEqual(
+            self.score(self.hot),
+            trending.POST_WEIGHT + 2 * trending.COMMENT_WEIGHT)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            self.score(self.quiet),
+            trending.POST_WEIGHT + trending.FOLLOW_WEIGHT)
+
+    def test_decay_halves_and_prunes(self):
+        now = timezone.now()
+        trending.decay(now)
+        half_life = timedelta(seconds=trending.half_life())
+        factor, deleted = trending.decay(now + half_life)
+        self.assertAlmostEqual(factor, 0.5)
+        self.assertEqual(deleted, 0)
+        self.assertAlmostEqual(self.score(self.quiet), 0.5)
+        trending.decay(now + 10 * half_life)
+        self.assertFalse(PostScore.objects.filter(post=self.quiet).exists())
+        self.assertEqual(
+            Watermark.objects.get(name=trending.DECAY_WATERMARK).value,
+            now + 10 * half_life)
+        Comment.objects.create(
+            post=self.quiet, author=self.reader, text='Снова в теме')
+        self.assertEqual(self.score(self.quiet), trending.COMMENT_WEIGHT)
+
+    def test_removed_comment_subtracts_decayed_weight(self):
+        """Скрытый комментарий убирает только затухший вклад."""
+        comment = self.hot.comments.first()
+        half_life = timedelta(seconds=trending.half_life())
+        trending.decay(comment.created)
+        trending.decay(comment.created + half_life)
+        comment.active = False
+        comment.save()
+        self.assertAlmostEqual(
+            self.score(self.hot),
+            (trending.POST_WEIGHT + 2 * trending.COMMENT_WEIGHT) / 2,
+            places=3)
+        PostScore.objects.filter(post=self.hot).update(score=0.1)
+        self.hot.comments.last().delete()
+        self.assertEqual(self.score(self.hot), 0)
+
+    def test_rebuild_matches_incremental(self):
+        scores = dict(PostScore.objects.values_list('post_id', 'score'))
+        PostScore.objects.all().delete()
+        self.assertEqual(trending.rebuild(), 2)
+        for post_id, score in PostScore.objects.values_list(
+                'post_id', 'score'):
+            self.assertAlmostEqual(score, scores[post_id], places=3)
+
+    def test_trending_page(self):
+        url = reverse('posts:trending')
+        with query_budget(budget_for('posts:trending'), 'posts:trending'):
+            response = self.client.get(url)
+        self.assertEqual(
+            list(response.context['page_obj']), [self.hot, self.quiet])
@@ -0,0 +1,50 @@
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..forms import PostForm
+
+
+def make_jpeg(size, orientation=None):
+    buffer = BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new('RGB', size, 'green').save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(POST_IMAGE_MAX_SIDE=500)
+class UploadNormalizationTests(TestCase):
+    def clean(self, upload):
+        form = PostForm({'text': 'Текст'}, {'image': upload})
+        return form, form.is_valid()
+
+    def test_large_image_downscaled_and_exif_removed(self):
+        """Большая картинка уменьшается, поворачивается и теряет EXIF."""
+        form, valid = self.clean(make_jpeg((1600, 800), orientation=6))
+        self.assertTrue(valid, form.errors)
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (250, 500))
+        self.assertFalse(image.getexif())
+        self.assertEqual(form.cleaned_data['image'].name, 'photo.jpg')
+
+    def test_small_image_kept_as_is(self):
+        upload = make_jpeg((100, 50))
+        form, valid = self.clean(upload)
+        self.assertTrue(valid, form.errors)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=10000)
+    def test_too_many_pixels_rejected(self):
+        form, valid = self.clean(make_jpeg((200, 100)))
+        self.assertFalse(valid)
+        self.assertTrue(form.has_error('image', 'too_many_pixels'))
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_too_large_file_rejected(self):
+        form, valid = self.clean(make_jpeg((100, 50)))
+        self.assertFalse(valid)
+        self.assertTrue(form.has_error('image', 'file_too_large'))
@@ -1,3 +1,5 @@
+import base64
+import json
 import shutil
 import tempfile
 from django.conf import settings
@@ -9,7 +11,9 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django import forms
 
-from ..models import Post, Group, Follow
+from core.query_budget import budget_for, query_budget
+from ..models import Comment, Post, Group, Follow
+from ..views import COMMENTS_IN_PAGE
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -289,10 +293,10 @@ class IndexPostListCache(TestCase):
     def test_cache(self):
         """Тестирование кэша на главной странице"""
         response = self.guest_client.get(reverse('posts:index'))
-        Post.objects.filter(pk=1).delete()
         response2 = self.guest_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response2.content)
-        cache.clear()
+        self.assertIsNone(response2.context)
+        Post.objects.filter(pk=self.post1.pk).delete()
         response3 = self.guest_client.get(reverse('posts:index'))
         self.assertNotEqual(response.content, response3.content)
 
@@ -365,3 +369,54 @@ class FollowTests(TestCase):
         self.assertEqual(resp.context.get('page_obj')[0].text, 'Testing text')
         self.assertFalse(response_il_adele.context.get('following'))
         self.assertNotIn('Adele text', resp.context.get('page_obj')[0].text)
+
+
+class CommentPagesTests(TestCase):
+    """Комментарии поста: первая страница в посте, дальше — фрагментами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Ответ {i}',
+                    active=i != 3)
+            for i in range(COMMENTS_IN_PAGE * 2 + 5)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comments_paged_by_cursor(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        first = list(response.context['comments'])
+        self.assertEqual(len(first), COMMENTS_IN_PAGE)
+        self.assertNotIn('Ответ 3', [c.text for c in first])
+        seen = [c.text for c in first]
+        cursor = response.context['comments'].next_cursor
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        while cursor:
+            with query_budget(budget_for('posts:post_comments'),
+                              'posts:post_comments'):
+                response = self.client.get(url, {'cursor': cursor})
+            self.assertNotContains(response, '<html')
+            seen += [c.text for c in response.context['comments']]
+            cursor = response.context['comments'].next_cursor
+        self.assertEqual(seen, list(
+            self.post.comments.filter(active=True).order_by(
+                'created', 'pk').values_list('text', flat=True)))
+
+    def test_comments_of_missing_post(self):
+        url = reverse('posts:post_comments', args=[self.post.pk + 1000])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_malformed_cursor_gives_first_page(self):
+        """Курсор с нестроковыми значениями не ломает фрагмент."""
+        data = json.dumps([0, 2, {'a': 1}, 1]).encode()
+        cursor = base64.urlsafe_b64encode(data).decode()
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['comments'].number, 1)
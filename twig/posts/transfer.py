@@ -0,0 +1,300 @@
+"""Потоковая выгрузка и загрузка пользователей, групп, постов,
+комментариев и подписок в NDJSON.
+
+Одна строка файла — один объект: {"model": "posts.post", "fields":
+{...}}, поля — как в базе (author_id, а не объект автора). Выгрузка
+читает таблицы по возрастанию pk через iterator(chunk_size), загрузка
+вставляет пакетами bulk_create, поэтому память не зависит от размера
+базы. Файл с расширением .gz читается и пишется через gzip.
+
+Обе стороны ведут контрольную точку в файле <имя>.checkpoint и после
+сбоя продолжают с неё. Профили, входящие ленты и поисковый индекс —
+производные данные: после загрузки они пересчитываются.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from . import counters, feed, search, stats, trending
+from .models import Comment, Follow, Group, Post, User
+from .seeding import manual_dates
+
+FORMAT = 'twig-ndjson'
+VERSION = 1
+CHUNK_SIZE = 2000
+# Порядок важен: объекты ссылаются только на выгруженные раньше.
+MODELS = (User, Group, Post, Comment, Follow)
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def open_stream(path, mode):
+    """Текстовый поток файла; *.gz — через gzip."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Encoder(DjangoJSONEncoder):
+    """Как в Django, но время — с микросекундами, без потерь."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def dumps(data):
+    return json.dumps(
+        data, cls=Encoder, ensure_ascii=False,
+        separators=(',', ':'),
+    )
+
+
+class Checkpoint:
+    """Прогресс в файле рядом с выгрузкой; пишется атомарной заменой."""
+
+    def __init__(self, path):
+        self.path = f'{path}.checkpoint'
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(state, file)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def resumable(path, state):
+    """Можно ли продолжить выгрузку: файл на месте и не короче точки."""
+    return (
+        state is not None
+        and os.path.exists(path)
+        and os.path.getsize(path) >= state['offset']
+    )
+
+
+def export_model(model, state, write, chunk_size):
+    """Пишет строки model после state['last_pk'] пакетами через write.
+
+    Перед записью пакета state сдвигается на его последний pk, так что
+    сохранённая точка всегда соответствует записанному.
+    """
+    names = [field.attname for field in model._meta.concrete_fields]
+    rows = model.objects.order_by('pk').values_list(*names)
+    if state['last_pk'] is not None:
+        rows = rows.filter(pk__gt=state['last_pk'])
+    name = label(model)
+    state['counts'].setdefault(name, 0)
+    lines = []
+
+    def flush(last_pk):
+        state['last_pk'] = last_pk
+        state['counts'][name] += len(lines)
+        write(lines)
+        lines.clear()
+
+    fields = None
+    for row in rows.iterator(chunk_size=chunk_size):
+        fields = dict(zip(names, row))
+        lines.append(dumps({'model': name, 'fields': fields}))
+        if len(lines) == chunk_size:
+            flush(fields[model._meta.pk.attname])
+    if lines:
+        flush(fields[model._meta.pk.attname])
+
+
+def export(path, chunk_size=CHUNK_SIZE):
+    """Выгружает все модели в path; возвращает {модель: число строк}.
+
+    Строки пишутся пакетами по chunk_size; после каждого пакета в
+    контрольной точке сохраняются размер файла и последний pk. Для .gz
+    каждый пакет — отдельный член gzip (их склейка читается как один
+    поток). Если рядом лежит контрольная точка, файл обрезается до
+    сохранённого размера, и выгрузка продолжается с неё: оборванный
+    пакет пропадает целиком, повторов не бывает. Если файл короче точки,
+    выгрузка начинается заново.
+    """
+    checkpoint = Checkpoint(path)
+    state = checkpoint.load()
+    if not resumable(path, state):
+        state = None
+    compress = path.endswith('.gz')
+    with open(path, 'wb' if state is None else 'r+b') as file:
+
+        def write(lines):
+            data = ''.join(f'{line}\n' for line in lines).encode()
+            if data:
+                file.write(gzip.compress(data) if compress else data)
+                file.flush()
+            state['offset'] = file.tell()
+            checkpoint.save(state)
+
+        if state is None:
+            state = {'model': 0, 'last_pk': None, 'counts': {}}
+            write([dumps({'format': FORMAT, 'version': VERSION})])
+        else:
+            file.truncate(state['offset'])
+            file.seek(state['offset'])
+        for index, model in enumerate(MODELS):
+            if index < state['model']:
+                continue
+            if index > state['model']:
+                state.update(model=index, last_pk=None)
+            export_model(model, state, write, chunk_size)
+            state.update(model=index + 1, last_pk=None)
+            write([])
+    checkpoint.clear()
+    return state['counts']
+
+
+def build(model, fields):
+    values = {
+        field.attname: field.to_python(fields[field.attname])
+        for field in model._meta.concrete_fields
+        if field.attname in fields
+    }
+    return model(**values)
+
+
+def check_empty():
+    """Загрузка идёт только в пустую базу: иначе строки выгрузки с
+    совпавшими ключами молча ссылались бы на чужие объекты."""
+    for model in MODELS:
+        if model.objects.exists():
+            raise ValueError(
+                f'База не пуста (есть {label(model)}): загрузка '
+                f'возможна только в пустую базу.')
+
+
+def start_load():
+    """Состояние новой (не продолженной) загрузки."""
+    check_empty()
+    return {'line': 0, 'counts': {}}
+
+
+def load(path, chunk_size=CHUNK_SIZE, index_search=False):
+    """Загружает выгрузку в пустую базу; возвращает {модель: число
+    вставленных строк}.
+
+    Каждый пакет — отдельная транзакция, после которой номер
+    прочитанной строки сохраняется в контрольной точке. При повторном
+    запуске строки до неё пропускаются. Объекты, уже вставленные
+    пакетом, чья точка не успела сохраниться, пропускаются
+    (ignore_conflicts): в пустой базе совпасть они могут только со
+    строками той же выгрузки.
+    """
+    models = {label(model): model for model in MODELS}
+    checkpoint = Checkpoint(path)
+    state = checkpoint.load() or start_load()
+    batch, batch_model = [], None
+
+    def flush(line):
+        keys = [obj.pk for obj in batch]
+        rows = batch_model.objects.filter(pk__range=(min(keys), max(keys)))
+        with transaction.atomic(), manual_dates(batch_model):
+            before = rows.count()
+            batch_model.objects.bulk_create(batch, ignore_conflicts=True)
+            inserted = rows.count() - before
+        name = label(batch_model)
+        state['counts'][name] = state['counts'].get(name, 0) + inserted
+        state['line'] = line
+        checkpoint.save(state)
+        batch.clear()
+
+    with open_stream(path, 'r') as stream:
+        number = 0
+        for number, line in enumerate(stream, 1):
+            if number <= state['line']:
+                continue
+            record = json.loads(line)
+            if 'format' in record:
+                if record != {'format': FORMAT, 'version': VERSION}:
+                    raise ValueError(f'Неизвестный формат выгрузки: {record}')
+                continue
+            model = models[record['model']]
+            if batch and (model is not batch_model
+                          or len(batch) >= chunk_size):
+                flush(number - 1)
+            batch_model = model
+            batch.append(build(model, record['fields']))
+        if batch:
+            flush(number)
+    # bulk_create обходит сигналы: пересчитываем то, что они ведут.
+    counters.reconcile()
+    trending.rebuild()
+    stats.rebuild()
+    if feed.fanout_enabled():
+        feed.fill_inboxes()
+    if index_search:
+        search.rebuild()
+    checkpoint.clear()
+    return state['counts']
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(2 ** 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def media_records():
+    """Файлы картинок постов: путь, размер и sha256 (или missing)."""
+    names = Post.objects.exclude(image='').order_by('image').values_list(
+        'image', flat=True).distinct()
+    for name in names.iterator():
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(path):
+            yield {'path': name, 'missing': True}
+            continue
+        yield {
+            'path': name,
+            'size': os.path.getsize(path),
+            'sha256': file_digest(path),
+        }
+
+
+def export_media_manifest(path):
+    total = 0
+    with open_stream(path, 'w') as stream:
+        for record in media_records():
+            stream.write(dumps(record))
+            stream.write('\n')
+            total += 1
+    return total
+
+
+def check_media_manifest(path):
+    """Пути из манифеста, которых нет в MEDIA_ROOT или они отличаются."""
+    problems = []
+    with open_stream(path, 'r') as stream:
+        for line in stream:
+            record = json.loads(line)
+            if record.get('missing'):
+                continue
+            local = os.path.join(settings.MEDIA_ROOT, record['path'])
+            if (not os.path.exists(local)
+                    or os.path.getsize(local) != record['size']
+                    or file_digest(local) != record['sha256']):
+                problems.append(record['path'])
+    return problems
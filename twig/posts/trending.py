@@ -0,0 +1,156 @@
+"""Популярные посты из материализованной таблицы рейтингов.
+
+Рейтинг поста хранится в PostScore и растёт по мере событий: новый пост
+получает POST_WEIGHT, каждый активный комментарий — COMMENT_WEIGHT,
+новая подписка на автора — FOLLOW_WEIGHT его свежим постам (моложе
+TRENDING_FOLLOW_WINDOW). Затухание применяется пакетом: decay() раз
+в несколько минут умножает все рейтинги на 2 ** (-прошло / период
+полураспада) и удаляет угасшие строки, поэтому таблица содержит только
+недавно обсуждавшиеся посты. Момент последнего затухания — Watermark.
+
+Страница популярного — чтение по индексу score, без подсчёта
+комментариев при запросе. rebuild() пересчитывает рейтинги заново
+по постам и комментариям (вклад подписок при этом теряется) — после
+bulk-загрузок, которые обходят сигналы.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Comment, Post, PostScore, Watermark
+
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 0.5
+DECAY_WATERMARK = 'trending_decay'
+
+
+def half_life():
+    """Период полураспада рейтинга в секундах."""
+    return getattr(settings, 'TRENDING_HALF_LIFE', 24 * 60 * 60)
+
+
+def min_score():
+    return getattr(settings, 'TRENDING_MIN_SCORE', 0.05)
+
+
+def follow_window():
+    return getattr(settings, 'TRENDING_FOLLOW_WINDOW', 3 * 24 * 60 * 60)
+
+
+def size():
+    return getattr(settings, 'TRENDING_SIZE', 100)
+
+
+def add(post_id, delta):
+    """Сдвигает рейтинг поста, создавая строку при необходимости.
+
+    Рейтинг не опускается ниже нуля.
+    """
+    with transaction.atomic():
+        updated = PostScore.objects.filter(post_id=post_id).update(
+            score=Greatest(F('score') + delta, 0))
+        if not updated and delta > 0:
+            PostScore.objects.get_or_create(post_id=post_id)
+            PostScore.objects.filter(post_id=post_id).update(
+                score=F('score') + delta)
+
+
+def add_post(post):
+    PostScore.objects.create(post=post, score=POST_WEIGHT)
+
+
+def comment_weight(created):
+    """Вклад комментария, написанного в created, в рейтинге сейчас.
+
+    Таблица затухла до момента последнего decay(): вклад комментария,
+    написанного раньше, уменьшился во столько же раз.
+    """
+    mark = Watermark.objects.filter(name=DECAY_WATERMARK).values_list(
+        'value', flat=True).first()
+    if mark is None:
+        return COMMENT_WEIGHT
+    return COMMENT_WEIGHT * decay_factor((mark - created).total_seconds())
+
+
+def remove_comment(comment):
+    """Убирает из рейтинга вклад скрытого или удалённого комментария."""
+    add(comment.post_id, -comment_weight(comment.created))
+
+
+def add_follow(author_id):
+    """Подписка поднимает свежие посты автора."""
+    since = timezone.now() - timedelta(seconds=follow_window())
+    PostScore.objects.filter(
+        post__author_id=author_id, post__pub_date__gte=since,
+    ).update(score=F('score') + FOLLOW_WEIGHT)
+
+
+def decay_factor(seconds):
+    return 0.5 ** (max(seconds, 0) / half_life())
+
+
+def decay(now=None):
+    """Применяет затухание с прошлого запуска; возвращает (множитель,
+    число удалённых строк)."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        mark, created = Watermark.objects.select_for_update().get_or_create(
+            name=DECAY_WATERMARK, defaults={'value': now})
+        factor = decay_factor((now - mark.value).total_seconds())
+        if factor < 1:
+            PostScore.objects.update(score=F('score') * factor)
+        deleted, _ = PostScore.objects.filter(
+            score__lt=min_score()).delete()
+        mark.value = now
+        mark.save()
+    return factor, deleted
+
+
+def horizon():
+    """Возраст, после которого вклад POST_WEIGHT опускается ниже порога."""
+    return half_life() * math.log2(POST_WEIGHT / min_score())
+
+
+def rebuild(now=None):
+    """Пересчитывает рейтинги; возвращает число постов в таблице."""
+    now = now or timezone.now()
+    since = now - timedelta(seconds=horizon())
+    scores = {}
+    for post_id, pub_date in Post.objects.filter(
+        pub_date__gte=since
+    ).values_list('pk', 'pub_date').iterator():
+        scores[post_id] = POST_WEIGHT * decay_factor(
+            (now - pub_date).total_seconds())
+    for post_id, created in Comment.objects.filter(
+        active=True, created__gte=since
+    ).values_list('post_id', 'created').iterator():
+        scores[post_id] = scores.get(post_id, 0) + (
+            COMMENT_WEIGHT * decay_factor((now - created).total_seconds()))
+    threshold = min_score()
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create(
+            (
+                PostScore(post_id=post_id, score=score)
+                for post_id, score in scores.items() if score >= threshold
+            ),
+            batch_size=500,
+        )
+        Watermark.objects.update_or_create(
+            name=DECAY_WATERMARK, defaults={'value': now})
+    return PostScore.objects.count()
+
+
+def top():
+    """Самые популярные посты с автором и группой — один запрос."""
+    return [
+        score.post for score in PostScore.objects.select_related(
+            'post__author', 'post__group',
+        ).order_by('-score', '-post_id')[:size()]
+    ]
@@ -0,0 +1,102 @@
+"""Подготовка загруженной картинки поста перед сохранением.
+
+Проверяет размер файла и число пикселей, уменьшает слишком большие
+оригиналы и убирает EXIF (координаты, модель камеры). Уменьшение идёт
+через draft/reduce Pillow: JPEG декодируется сразу в уменьшенном
+масштабе, поэтому полный кадр на 40 мегапикселей в память не попадает.
+
+Картинки, которые укладываются в ограничения и не содержат EXIF,
+сохраняются как есть, байт в байт.
+"""
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import (TemporaryUploadedFile,
+                                            UploadedFile)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+DEFAULT_MAX_BYTES = 10 * 2 ** 20
+DEFAULT_MAX_PIXELS = 50 * 10 ** 6
+DEFAULT_MAX_SIDE = 2048
+# Во сколько раз заготовка после reduce может быть больше итогового
+# размера перед финальным сглаживанием LANCZOS.
+REDUCING_GAP = 2.0
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def limits():
+    return (
+        getattr(settings, 'POST_IMAGE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        getattr(settings, 'POST_IMAGE_MAX_PIXELS', DEFAULT_MAX_PIXELS),
+        getattr(settings, 'POST_IMAGE_MAX_SIDE', DEFAULT_MAX_SIDE),
+    )
+
+
+def has_metadata(image):
+    return bool(image.getexif())
+
+
+def normalize_image(upload):
+    """Проверяет и при необходимости пересохраняет загруженную картинку.
+
+    Возвращает исходный файл или новый временный файл на диске.
+    """
+    if not isinstance(upload, UploadedFile):
+        # Уже сохранённая картинка при редактировании поста.
+        return upload
+    max_bytes, max_pixels, max_side = limits()
+    if upload.size > max_bytes:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(max_bytes)},
+        )
+    upload.seek(0)
+    # open читает только заголовок: размеры известны до декодирования.
+    image = Image.open(upload)
+    if image.width * image.height > max_pixels:
+        raise ValidationError(
+            'Картинка больше %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': f'{max_pixels / 10 ** 6:g}'},
+        )
+    animated = getattr(image, 'is_animated', False)
+    oversized = max(image.size) > max_side
+    if animated or not (oversized or has_metadata(image)):
+        upload.seek(0)
+        return upload
+    return resave(upload, image, max_side)
+
+
+def resave(upload, image, max_side):
+    """Уменьшенная копия картинки без EXIF во временном файле."""
+    image_format = image.format
+    icc_profile = image.info.get('icc_profile')
+    scale = min(1, max_side / max(image.size))
+    target = (
+        max(1, round(image.width * scale)),
+        max(1, round(image.height * scale)),
+    )
+    # draft просит декодер JPEG сразу отдать кадр в масштабе 1/2–1/8,
+    # не меньше target; reduce внутри thumbnail быстро ужимает его
+    # в целое число раз, и только остаток сглаживается LANCZOS.
+    image.draft(image.mode, target)
+    image.thumbnail(target, Image.LANCZOS, REDUCING_GAP)
+    image = ImageOps.exif_transpose(image)
+    options = dict(SAVE_OPTIONS.get(image_format, {}))
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    result = TemporaryUploadedFile(
+        os.path.basename(upload.name), upload.content_type, 0,
+        upload.charset, upload.content_type_extra,
+    )
+    image.save(result.file, image_format, **options)
+    result.size = result.file.tell()
+    result.seek(0)
+    return result
@@ -13,6 +13,15 @@ urlpatterns = [
     path('posts/<int:post_id>/',
          views.post_detail,
          name='post_detail'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
+    path('trending/',
+         views.trending_posts,
+         name='trending'),
+    path('search/',
+         views.post_search,
+         name='search'),
     path('create/',
          views.post_create,
          name='post_create'),
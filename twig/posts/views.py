@@ -1,48 +1,63 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
 
+from . import feed, search, stats, trending
+from .cache import cached_page, conditional_page, post_page_scopes
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
+from .models import Comment, Post, Group, User, Follow
+from .paginators import CursorPaginator
 
 POSTS_IN_PAGE = 10
+COMMENTS_IN_PAGE = 20
 
 
 def get_page_context(objects, request):
     """Pagination"""
-    paginator = Paginator(objects, POSTS_IN_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(objects, POSTS_IN_PAGE)
+    page_obj = paginator.get_page(
+        request.GET.get('page'),
+        cursor=request.GET.get('cursor'),
+    )
     return page_obj
 
 
-@cache_page(20, key_prefix='index_page')
+@conditional_page('index')
+@cached_page('index')
 def index(request):
-    page_obj = get_page_context(Post.objects.all(), request)
+    page_obj = get_page_context(Post.objects.with_related(), request)
     context = {
         'page_obj': page_obj
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page('group:{slug}')
+@cached_page('group:{slug}')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page_context(group.posts.all(), request)
+    posts = group.posts.with_related()
+    page_obj = get_page_context(posts, request)
     context = {
         'posts': posts,
         'group': group,
         'page_obj': page_obj,
+        'stats': stats.panel(group),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page('profile:{username}')
+@cached_page('profile:{username}')
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username)
     following = (request.user.is_authenticated and author.following.filter(
         user=request.user).exists())
-    page_obj = get_page_context(author.posts.all(), request)
+    page_obj = get_page_context(author.posts.with_related(), request)
     context = {
         'author': author,
         'page_obj': page_obj,
@@ -51,20 +66,75 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def comments_page(post_id, request):
+    """Страница активных комментариев поста по курсору, от старых к новым."""
+    comments = Comment.objects.filter(
+        post_id=post_id, active=True).select_related('author')
+    paginator = CursorPaginator(
+        comments, COMMENTS_IN_PAGE, ('created', 'pk'))
+    return paginator.get_page(cursor=request.GET.get('cursor'))
+
+
+@conditional_page('post:{post_id}', related=post_page_scopes)
+@cached_page('post:{post_id}', related=post_page_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.with_related().select_related('author__profile'),
+        id=post_id,
+    )
     form = CommentForm(
         request.POST or None,
     )
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'comments': comments_page(post_id, request),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional_page('post:{post_id}')
+@cached_page('post:{post_id}')
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для подгрузки."""
+    if not Post.objects.filter(pk=post_id).exists():
+        # Пустой фрагмент с кодом 200 попал бы в кэш страниц.
+        raise Http404('Пост не найден')
+    context = {
+        'post_id': post_id,
+        'comments': comments_page(post_id, request),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def trending_posts(request):
+    """Популярное: готовые рейтинги из PostScore, одно чтение по индексу."""
+    page_obj = Paginator(trending.top(), POSTS_IN_PAGE).get_page(
+        request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def post_search(request):
+    """Поиск по постам и комментариям, самые подходящие — первыми."""
+    query = request.GET.get('q', '').strip()
+    ids = search.search(query) if query else []
+    page_obj = Paginator(ids, POSTS_IN_PAGE).get_page(request.GET.get('page'))
+    posts = Post.objects.with_related().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -116,9 +186,12 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional_page('index', 'feed:{user}')
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user).all()
-    page_obj = get_page_context(post_list, request)
+    page_obj = feed.paginator(request.user, POSTS_IN_PAGE).get_page(
+        request.GET.get('page'),
+        cursor=request.GET.get('cursor'),
+    )
     context = {
         'page_obj': page_obj
     }
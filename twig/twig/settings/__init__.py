@@ -0,0 +1,21 @@
+"""Настройки проекта по профилям.
+
+Профиль выбирается переменной окружения TWIG_ENV: dev (по умолчанию),
+test (включается сам при запуске manage.py test и pytest) или prod.
+Модуль профиля можно указать и напрямую:
+DJANGO_SETTINGS_MODULE=twig.settings.prod.
+"""
+import os
+import sys
+
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+TWIG_ENV = os.environ.get('TWIG_ENV') or ('test' if TESTING else 'dev')
+
+if TWIG_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif TWIG_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+elif TWIG_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(f'Неизвестный профиль настроек TWIG_ENV={TWIG_ENV}')
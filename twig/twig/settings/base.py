@@ -0,0 +1,275 @@
+"""Настройки, общие для всех профилей (dev, test, prod)."""
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', 'm!gawayu0_a%*was9c92mo4m!4o8&!=poj41vpnru&o_xem(a@'
+)
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+    'www.ilyafabiyanskiy.pythonanywhere.com',
+    'ilyafabiyanskiy.pythonanywhere.com',
+]
+# Кэш выбирается переменной окружения CACHE_BACKEND:
+# locmem — в памяти процесса (по умолчанию): у каждого процесса свои
+# версии страниц (posts.cache), и сброс в одном другие не видят;
+# sqlite — общий для всех процессов файл SQLite с LRU-вытеснением;
+# file — файловый кэш Django.
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+            'MAX_SIZE': int(os.environ.get('CACHE_MAX_SIZE', 64 * 2 ** 20)),
+        },
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION or os.path.join(BASE_DIR, 'cache'),
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
+}
+
+# Страницы лент для анонимных посетителей живут в кэше, пока их версию
+# не сбросит изменение поста, комментария или группы.
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Отрендеренные карточки постов: ключ меняется вместе с содержимым,
+# поэтому срок нужен только чтобы вытеснять старые версии.
+POST_CARD_TIMEOUT = 24 * 60 * 60
+# Карточка, у которой миниатюры ещё считаются, показывает оригинал;
+# столько она живёт в кэше до повторной проверки.
+POST_PENDING_CARD_TIMEOUT = 60
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Application definition
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.db.PrimaryStickyMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Раз в столько секунд сводка core.metrics пишется в лог 'twig.metrics'
+# (0 — не писать); сами метрики — на /admin/metrics/.
+METRICS_LOG_INTERVAL = 60
+
+# Сколько SQL-запросов разрешено странице (включая сессию и пользователя).
+# Превышение пишется в лог 'twig.query_budget'; в режиме 'raise' —
+# исключение. Те же бюджеты проверяются тестами posts/tests/test_queries.py.
+QUERY_BUDGET_MODE = 'log'
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 7,
+    'posts:profile': 6,
+    'posts:post_detail': 5,
+    'posts:post_comments': 3,
+    'posts:follow_index': 5,
+    'posts:search': 4,
+    'posts:trending': 3,
+    'api:post_list': 3,
+    'api:post_detail': 3,
+    'api:comment_list': 3,
+    'api:follow_list': 4,
+}
+
+ROOT_URLCONF = 'twig.urls'
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        # Движок Django с замером времени рендеринга для core.metrics.
+        'BACKEND': 'core.metrics.Templates',
+        'NAME': 'django',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'twig.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+SQLITE_PATH = os.environ.get(
+    'SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+)
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': SQLITE_PATH,
+    },
+    # Тот же файл, открытый только для чтения (core.db.ReadWriteRouter).
+    'read': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{SQLITE_PATH}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_REPLICAS = ['read']
+# Сколько секунд после записи пользователь читает только из default.
+# Реплика 'read' — тот же файл и никогда не отстаёт, поэтому 0.
+DATABASE_PRIMARY_STICKY_SECONDS = 0
+# Отдельный файл-реплика, который догоняет основную базу командой
+# sync_replica: так локально проверяется работа с отстающей репликой.
+SQLITE_REPLICA_PATH = os.environ.get('SQLITE_REPLICA_PATH')
+if SQLITE_REPLICA_PATH:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{SQLITE_REPLICA_PATH}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+    DATABASE_PRIMARY_STICKY_SECONDS = int(
+        os.environ.get('DATABASE_PRIMARY_STICKY_SECONDS', 10)
+    )
+DATABASE_ROUTERS = ['core.db.ReadWriteRouter']
+
+# Выполняются для каждого нового соединения (core.db.configure_sqlite).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    # В режиме WAL синхронизация с диском только на контрольных точках:
+    # закоммиченное переживёт падение процесса, но не отключение питания.
+    'synchronous': 'normal',
+    # Ждать освободившуюся блокировку до 5 с, а не падать сразу.
+    'busy_timeout': 5000,
+    # Страничный кэш соединения — 32 МБ (отрицательное значение в КБ).
+    'cache_size': -32000,
+    # Читать базу через отображение в память, до 256 МБ.
+    'mmap_size': 256 * 2 ** 20,
+    'temp_store': 'memory',
+}
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_URL = '/static/'
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов считаются в фоне после сохранения поста
+# (THUMBNAIL_WORKERS = 0 — синхронно, в том же потоке).
+POST_THUMBNAIL_SIZES = ('600x600', '500x500', '300x300')
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+THUMBNAIL_ENGINE = 'posts.images.Engine'
+# Загрузка картинок: файлы сразу пишутся во временный файл на диске,
+# а не в память. Больше POST_IMAGE_MAX_BYTES и POST_IMAGE_MAX_PIXELS
+# картинки не принимаются, большая сторона уменьшается до
+# POST_IMAGE_MAX_SIDE, EXIF удаляется.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POST_IMAGE_MAX_BYTES = 10 * 2 ** 20
+POST_IMAGE_MAX_PIXELS = 50 * 10 ** 6
+POST_IMAGE_MAX_SIDE = 2048
+# Сколько самых подходящих постов возвращает поиск.
+SEARCH_MAX_RESULTS = 500
+# Варианты картинок в современных форматах для <picture>/srcset:
+# ширины в пикселях и параметры кодирования для каждого формата
+# (форматы, которые Pillow не умеет сохранять, пропускаются).
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_FORMATS = {
+    'avif': {'quality': 50},
+    'webp': {'quality': 80, 'method': 4},
+}
+
+# Лента подписок: раскладка новых постов по входящим подписчиков.
+# Посты авторов, у которых подписчиков больше порога, подмешиваются
+# в ленту при чтении (None — раскладывать всегда).
+FEED_FANOUT = True
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+
+# Популярное (posts.trending): период полураспада рейтинга в секундах,
+# порог, ниже которого строка удаляется, окно свежих постов, которые
+# поднимает новая подписка, и длина списка.
+TRENDING_HALF_LIFE = 24 * 60 * 60
+TRENDING_MIN_SCORE = 0.05
+TRENDING_FOLLOW_WINDOW = 3 * 24 * 60 * 60
+TRENDING_SIZE = 100
+
+# Панель статистики группы (posts.stats): за сколько дней показывать
+# активность и сколько самых активных авторов.
+GROUP_STATS_DAYS = 30
+GROUP_STATS_TOP_AUTHORS = 5
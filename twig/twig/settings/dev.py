@@ -0,0 +1,17 @@
+"""Разработка: режим отладки и django-debug-toolbar."""
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+# Панель ставится сразу после QueryBudgetMiddleware, как и раньше.
+BUDGET = MIDDLEWARE.index('core.query_budget.QueryBudgetMiddleware') + 1
+MIDDLEWARE = MIDDLEWARE[:BUDGET] + [
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+] + MIDDLEWARE[BUDGET:]
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
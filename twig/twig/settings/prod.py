@@ -0,0 +1,76 @@
+"""Боевой сервер: настройки под пропускную способность.
+
+Без режима отладки и debug toolbar; соединения с базой живут между
+запросами (CONN_MAX_AGE); шаблоны разбираются один раз на процесс
+кэширующим загрузчиком и загружаются заранее при старте WSGI-приложения;
+сессии читаются из кэша, общего для всех процессов; SECRET_KEY
+обязательно задаётся в окружении; статика отдаётся с хэшем в имени, поэтому её
+можно кэшировать в браузере навсегда (нужен collectstatic).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import ALLOWED_HOSTS, BASE_DIR, CACHE_BACKENDS, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте SECRET_KEY в окружении.')
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get('ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+] or ALLOWED_HOSTS
+
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [
+            processor for processor in TEMPLATES[0]['OPTIONS'][
+                'context_processors']
+            if processor != 'django.template.context_processors.debug'
+        ],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+# Загрузить все шаблоны в кэш при старте процесса (twig/wsgi.py).
+TEMPLATE_WARMUP = True
+
+# Версии страниц (posts.cache) должны быть общими для всех воркеров,
+# поэтому locmem здесь не подходит.
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'sqlite')],
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+STATIC_ROOT = os.environ.get(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'static_root')
+)
+STATICFILES_STORAGE = 'core.storage.ManifestStorage'
+
+# Сводки core.metrics и предупреждения бюджетов запросов — в stderr.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'twig': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
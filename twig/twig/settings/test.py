@@ -0,0 +1,14 @@
+"""Тесты: без отладочных инструментов, быстрые пароли, всё синхронно."""
+from .base import *  # noqa: F401,F403
+
+# Фоновые потоки миниатюр пишут в MEDIA_ROOT, который тесты удаляют.
+THUMBNAIL_WORKERS = 0
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Тестовая база в памяти: все запросы в одно соединение default.
+DATABASES = {'default': DATABASES['default']}  # noqa: F405
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'twig.settings')
 
 application = get_wsgi_application()
+
+if getattr(settings, 'TEMPLATE_WARMUP', False):
+    from core.templates import warm_up
+
+    warm_up()